@@ -0,0 +1,115 @@
+"""
+Batch path queries against a single obstacle map. The map is placed in shared
+memory once and every worker process builds its Board from it at start-up, so
+tasks only carry the (start, end) pairs. Results are yielded as they finish.
+
+Usage: python batch.py --size 500x500 --density 0.25 --queries 2000 --processes 4
+
+With --goals N the queries share N ends, as many units heading for a few
+destinations would, which the field algorithm answers from distance fields
+that each worker keeps between tasks.
+"""
+import argparse
+import os
+import time
+import numpy as np
+
+from multiprocessing import Pool, shared_memory
+from board import Board
+from settings import methods
+from solver import Solver
+
+
+# State of each worker process, set up by attach
+worker = {}
+
+
+def open_shared(name: str) -> shared_memory.SharedMemory:
+    """Attaches to an existing block without letting this process unlink it on exit."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 has no track argument
+        return shared_memory.SharedMemory(name=name)
+
+
+def attach(name: str, shape: tuple, algorithm: str) -> None:
+    """Pool initializer, building the worker's Board from the shared map."""
+    block = open_shared(name)
+    mask = np.ndarray(shape, dtype=bool, buffer=block.buf)
+
+    worker["block"] = block
+    worker["solver"] = Solver(Board.from_mask(mask))
+    worker["algorithm"] = algorithm
+
+
+def work(task: tuple) -> tuple:
+    """Solves one query inside a worker."""
+    number, start, end = task
+    solver = worker["solver"]
+    return number, getattr(solver, worker["algorithm"])(start, end)
+
+
+def solve_many(mask, queries, algorithm: str = "asearch", processes: int = None, chunksize: int = 8):
+    """
+    Solves every (start, end) query on the mask across a pool of processes,
+    yielding (query number, Result) pairs in the order they complete.
+    """
+    mask = np.asarray(mask) != 0
+    block = shared_memory.SharedMemory(create=True, size=max(mask.nbytes, 1))
+
+    try:
+        shared = np.ndarray(mask.shape, dtype=bool, buffer=block.buf)
+        shared[:] = mask
+
+        tasks = ((number, tuple(start), tuple(end)) for number, (start, end) in enumerate(queries))
+
+        with Pool(processes, initializer=attach, initargs=(block.name, mask.shape, algorithm)) as pool:
+            yield from pool.imap_unordered(work, tasks, chunksize)
+
+    finally:
+        block.close()
+        block.unlink()
+
+
+def random_queries(mask: np.ndarray, count: int, rng, goals: int = None) -> list:
+    """Picks random pairs of free cells, the ends drawn from only goals cells if given."""
+    free = np.argwhere(mask == 0)
+    picks = rng.integers(len(free), size=(count, 2))
+    if goals is not None:
+        ends = rng.integers(len(free), size=goals)
+        picks[:, 1] = ends[rng.integers(goals, size=count)]
+    return [(tuple(free[a]), tuple(free[b])) for a, b in picks]
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Solve many queries on one map in parallel")
+    parser.add_argument("--size", default="500x500", help="HEIGHTxWIDTH of the random map")
+    parser.add_argument("--density", type=float, default=0.25)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--goals", type=int, help="share this many ends between the queries")
+    parser.add_argument("--algorithm", default="asearch", choices=list(methods.values()))
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    height, width = (int(part) for part in args.size.lower().split("x"))
+    rng = np.random.default_rng(args.seed)
+    mask = (rng.random((height, width)) < args.density).astype(np.uint8)
+    queries = random_queries(mask, args.queries, rng, args.goals)
+
+    began = time.perf_counter()
+    found = 0
+    for _, result in solve_many(mask, queries, args.algorithm, args.processes):
+        found += result.found
+    elapsed = time.perf_counter() - began
+
+    print(
+        f"{args.queries} queries on {args.processes} processes in {elapsed:.2f}s "
+        f"({args.queries / elapsed:.1f}/s), {found} paths found"
+    )
+
+
+if __name__ == "__main__":
+    main()
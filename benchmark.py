@@ -0,0 +1,258 @@
+"""
+Headless benchmark for the search algorithms. Sweeps grid sizes, obstacle
+densities, seeds and start/end placements, and reports time, expansions,
+frontier pushes and pops, peak open and closed set sizes, path length and
+memory for every run.
+
+It can also run the queries of a Moving AI scenario file instead, comparing
+each path with the optimal length the file records. Moving AI paths may not
+cut corners, which these searches do, so costs can come out below optimal.
+
+Usage: python benchmark.py --sizes 50x50 200x200 --densities 0.1 0.3 --output results.json
+       python benchmark.py --weights 9 --algorithms djikstra dial asearch
+       python benchmark.py --scenario arena.map.scen --algorithms asearch jps
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+from board import Board
+from maps import load, load_scenarios
+from settings import methods
+from solver import Solver
+from utils import parse_size
+
+
+FIELDS = [
+    "algorithm",
+    "height",
+    "width",
+    "density",
+    "weights",
+    "seed",
+    "placement",
+    "found",
+    "time",
+    "expanded",
+    "generated",
+    "peak_open",
+    "peak_closed",
+    "pushes",
+    "pops",
+    "reopened",
+    "path_length",
+    "cost",
+    "board_bytes",
+    "peak_memory",
+]
+
+SCENARIO_FIELDS = [
+    "algorithm",
+    "map",
+    "bucket",
+    "start",
+    "end",
+    "found",
+    "time",
+    "expanded",
+    "generated",
+    "peak_open",
+    "peak_closed",
+    "pushes",
+    "pops",
+    "reopened",
+    "path_length",
+    "cost",
+    "optimal",
+]
+
+
+def random_mask(height: int, width: int, density: float, rng) -> np.ndarray:
+    """Random obstacle mask in the style of the runner's maze, with a given density."""
+    return (rng.random((height, width)) < density).astype(np.uint8)
+
+
+def place(mask: np.ndarray, placement: str, rng) -> tuple:
+    """Picks the start and end cells for a run and clears them in the mask."""
+    height, width = mask.shape
+
+    if placement == "corners":
+        start, end = (0, 0), (height - 1, width - 1)
+    elif placement == "edges":
+        start, end = (height // 2, 0), (height // 2, width - 1)
+    else:
+        start = (int(rng.integers(height)), int(rng.integers(width)))
+        end = start
+        while end == start:
+            end = (int(rng.integers(height)), int(rng.integers(width)))
+
+    mask[start] = 0
+    mask[end] = 0
+    return start, end
+
+
+def run(board: Board, algorithm: str, start: tuple, end: tuple, repeat: int, memory: bool) -> dict:
+    """Times one query, keeping the best of several repeats."""
+    solver = Solver(board)
+    best = float("inf")
+
+    for _ in range(repeat):
+        began = time.perf_counter()
+        result = getattr(solver, algorithm)(start, end)
+        best = min(best, time.perf_counter() - began)
+
+    # Measure allocations in a separate pass, as tracing slows the search down
+    peak_memory = None
+    if memory:
+        tracemalloc.start()
+        getattr(solver, algorithm)(start, end)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {
+        "found": result.found,
+        "time": best,
+        "expanded": result.expanded,
+        "generated": result.generated,
+        "peak_open": result.peak_open,
+        "peak_closed": result.peak_closed,
+        "pushes": result.pushes,
+        "pops": result.pops,
+        "reopened": result.reopened,
+        "path_length": len(result.path),
+        "cost": round(result.cost, 4),
+        "board_bytes": board.nbytes,
+        "peak_memory": peak_memory,
+    }
+
+
+def sweep(args) -> list:
+    """Runs every combination of the requested parameters."""
+    rows = []
+
+    for height, width in args.sizes:
+        for density in args.densities:
+            for seed in args.seeds:
+                for placement in args.placements:
+
+                    # Build the map once and share it between the algorithms
+                    rng = np.random.default_rng(seed)
+                    mask = random_mask(height, width, density, rng)
+                    start, end = place(mask, placement, rng)
+                    board = Board.from_mask(mask)
+                    if args.weights > 1:
+                        board.set_costs(rng.integers(1, args.weights + 1, size=(height, width)))
+
+                    for algorithm in args.algorithms:
+                        row = {
+                            "algorithm": algorithm,
+                            "height": height,
+                            "width": width,
+                            "density": density,
+                            "weights": args.weights,
+                            "seed": seed,
+                            "placement": placement,
+                        }
+                        row.update(run(board, algorithm, start, end, args.repeat, args.memory))
+                        rows.append(row)
+                        report(row)
+
+    return rows
+
+
+def scenarios(args) -> list:
+    """Runs every query of a scenario file, loading each map once."""
+    rows = []
+    boards = {}
+
+    for scenario in load_scenarios(args.scenario):
+        if scenario.map_path not in boards:
+            boards[scenario.map_path] = Board.from_mask(load(scenario.map_path))
+        board = boards[scenario.map_path]
+
+        for algorithm in args.algorithms:
+            row = {
+                "algorithm": algorithm,
+                "map": os.path.basename(scenario.map_path),
+                "bucket": scenario.bucket,
+                "start": scenario.start,
+                "end": scenario.end,
+                "optimal": scenario.optimal,
+            }
+            # Memory is skipped here, as a benchmark set runs thousands of queries
+            result = run(board, algorithm, scenario.start, scenario.end, args.repeat, False)
+            row.update((field, result[field]) for field in SCENARIO_FIELDS if field in result)
+            rows.append(row)
+            report_scenario(row)
+
+    return rows
+
+
+def report_scenario(row: dict) -> None:
+    """Prints a single scenario result, with its gap to the recorded optimum."""
+    print(
+        f"{row['algorithm']:>9} {row['map']:<16} bucket={row['bucket']:<4} "
+        f"{'found' if row['found'] else 'none ':<5} {row['time'] * 1000:>10.2f}ms "
+        f"expanded={row['expanded']:<9} cost={row['cost']:<10} optimal={row['optimal']:.4f}"
+    )
+
+
+def report(row: dict) -> None:
+    """Prints a single result as a line of the summary table."""
+    memory = "-" if row["peak_memory"] is None else f"{row['peak_memory'] / 1e3:.0f}kB"
+    print(
+        f"{row['algorithm']:>9} {row['height']:>5}x{row['width']:<5} "
+        f"d={row['density']:<4} seed={row['seed']:<3} {row['placement']:<8} "
+        f"{'found' if row['found'] else 'none ':<5} {row['time'] * 1000:>10.2f}ms "
+        f"expanded={row['expanded']:<9} open={row['peak_open']:<8} "
+        f"path={row['path_length']:<6} mem={memory}"
+    )
+
+
+def write(rows: list, path: str, fields: list = FIELDS) -> None:
+    """Writes the results as CSV or JSON depending on the file extension."""
+    with open(path, "w", newline="") as file:
+        if path.endswith(".csv"):
+            writer = csv.DictWriter(file, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(rows)
+        else:
+            json.dump(rows, file, indent=2)
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Benchmark the pathfinding algorithms")
+    parser.add_argument("--algorithms", nargs="+", default=list(methods.values()),
+                        choices=list(methods.values()))
+    parser.add_argument("--sizes", nargs="+", type=parse_size, default=[(25, 40), (100, 100), (250, 250)])
+    parser.add_argument("--densities", nargs="+", type=float, default=[0.0, 0.2, 0.35])
+    parser.add_argument("--weights", type=int, default=1,
+                        help="give each cell a random terrain cost from 1 to this")
+    parser.add_argument("--seeds", nargs="+", type=int, default=[0, 1, 2])
+    parser.add_argument("--placements", nargs="+", default=["corners", "random"],
+                        choices=["corners", "edges", "random"])
+    parser.add_argument("--repeat", type=int, default=1, help="runs per query, keeping the fastest")
+    parser.add_argument("--no-memory", dest="memory", action="store_false",
+                        help="skip the tracemalloc pass")
+    parser.add_argument("--output", help="write the results to a .json or .csv file")
+    parser.add_argument("--scenario", help="run the queries of a Moving AI .scen file instead of a sweep")
+    args = parser.parse_args()
+
+    if args.scenario:
+        rows, fields = scenarios(args), SCENARIO_FIELDS
+    else:
+        rows, fields = sweep(args), FIELDS
+
+    if args.output:
+        write(rows, args.output, fields)
+        print(f"Wrote {len(rows)} results to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Struct-of-arrays storage for the cells of a grid. Every per-cell attribute is a
+contiguous NumPy array indexed by the flat cell index i * width + j, so large
+maps cost a few bytes per cell rather than a Python object each.
+"""
+import numpy as np
+
+from math import sqrt
+
+
+# Bit flags held in Board.state
+START = 1
+END = 2
+OPENED = 4
+CLOSED = 8
+PATH = 16
+OPENED_BACK = 32
+CLOSED_BACK = 64
+
+# Flags written by searches, as opposed to the start and end markers
+SEARCH = OPENED | CLOSED | PATH | OPENED_BACK | CLOSED_BACK
+
+# Directions to the eight neighbours of a cell, one bit each in Board.adjacency
+DIRECTIONS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+
+
+class Board:
+    """The cells of a grid, stored as flat arrays."""
+
+    def __init__(self, height: int, width: int):
+
+        self.height = height
+        self.width = width
+        self.size = height * width
+
+        # Layout of the map. Edit it through set_obstruction or set_mask so that
+        # the adjacency index stays in step
+        self.obstruction = np.zeros(self.size, dtype=bool)
+
+        # Bit k is set when the neighbour in DIRECTIONS[k] exists and is free
+        self.adjacency = np.zeros(self.size, dtype=np.uint8)
+
+        # Terrain cost of entering each cell, at least 1. A move costs its
+        # length times the cost of the cell it enters. Edit it through set_cost
+        # or set_costs so that the listeners hear about it
+        self.cost = np.ones(self.size, dtype=np.uint8)
+
+        # For every possible adjacency byte, the (offset, step cost) pairs of
+        # the neighbours it allows
+        self.moves = [
+            tuple(
+                (di * width + dj, sqrt(2) if di and dj else 1.0)
+                for k, (di, dj) in enumerate(DIRECTIONS)
+                if bits >> k & 1
+            )
+            for bits in range(256)
+        ]
+
+        # Search state. Every search is a new generation, and g, f and
+        # parent_index only hold values for cells stamped with the current
+        # one, so they never need clearing. The state flags are cleared in
+        # a single pass over one byte per cell
+        self.g = np.zeros(self.size, dtype=np.float32)
+        self.f = np.zeros(self.size, dtype=np.float32)
+        self.parent_index = np.full(self.size, -1, dtype=np.int32)
+        self.state = np.zeros(self.size, dtype=np.uint8)
+        self.stamp = np.zeros(self.size, dtype=np.uint32)
+        self.generation = 1
+
+        # Called with the changed cell indices, or None for the whole map,
+        # whenever the obstacle layout is edited
+        self.listeners = []
+
+        self.build_adjacency()
+
+    @classmethod
+    def from_mask(cls, mask) -> "Board":
+        """Creates a board from a 2D mask, where a truthy value is an obstruction."""
+        mask = np.asarray(mask)
+        board = cls(*mask.shape)
+        board.set_mask(mask)
+        return board
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the cell arrays."""
+        return sum(
+            array.nbytes
+            for array in (
+                self.obstruction, self.adjacency, self.cost, self.g, self.f, self.parent_index, self.state,
+                self.stamp,
+            )
+        )
+
+    def index(self, i: int, j: int) -> int:
+        """Converts (row, column) coordinates into a flat cell index."""
+        return i * self.width + j
+
+    def coords(self, index: int) -> tuple:
+        """Converts a flat cell index into (row, column) coordinates."""
+        return divmod(int(index), self.width)
+
+    @property
+    def weighted(self) -> bool:
+        """Whether any cell costs more than 1 to enter."""
+        return bool(self.cost.max() > 1)
+
+    def min_cost(self) -> int:
+        """The cheapest terrain cost of a free cell, which scales the heuristics."""
+        free = self.cost[~self.obstruction]
+        return int(free.min()) if len(free) else 1
+
+    def path_cost(self, path: list) -> float:
+        """Total cost of a path of (row, column) cells over the terrain."""
+        if len(path) < 2:
+            return 0.0
+
+        cells = np.asarray(path)
+        lengths = np.where(np.abs(np.diff(cells, axis=0)).sum(axis=1) == 2, sqrt(2), 1.0)
+        entered = self.cost[cells[1:, 0] * self.width + cells[1:, 1]]
+        return float(np.dot(lengths, entered))
+
+    def neighbours(self, index: int) -> list:
+        """Returns the free cells adjacent to the cell."""
+        return [index + offset for offset, _ in self.moves[self.adjacency[index]]]
+
+    def subscribe(self, listener) -> None:
+        """Registers a callable to hear about edits to the obstacle layout."""
+        self.listeners.append(listener)
+
+    def unsubscribe(self, listener) -> None:
+        """Stops a listener hearing about edits."""
+        self.listeners.remove(listener)
+
+    def changed(self, indices) -> None:
+        """Tells the listeners which cells changed, None meaning all of them."""
+        for listener in self.listeners:
+            listener(indices)
+
+    def set_mask(self, mask) -> None:
+        """Replaces the obstacle layout with the mask."""
+        self.obstruction[:] = np.asarray(mask).reshape(self.size) != 0
+        self.build_adjacency()
+        self.changed(None)
+
+    def set_obstruction(self, index: int, value: bool) -> None:
+        """Changes a single cell and patches the adjacency of its neighbours."""
+        value = bool(value)
+        if self.obstruction[index] == value:
+            return
+
+        self.obstruction[index] = value
+        i, j = self.coords(index)
+
+        # The neighbour in direction k reaches this cell through direction 7 - k
+        for k, (di, dj) in enumerate(DIRECTIONS):
+            if 0 <= i + di < self.height and 0 <= j + dj < self.width:
+                neighbour = index + di * self.width + dj
+                if value:
+                    self.adjacency[neighbour] &= ~(1 << (7 - k)) & 0xFF
+                else:
+                    self.adjacency[neighbour] |= 1 << (7 - k)
+
+        self.changed([index])
+
+    def set_cost(self, index: int, value: int) -> None:
+        """Changes the terrain cost of a single cell."""
+        value = min(max(int(value), 1), 255)
+        if self.cost[index] == value:
+            return
+
+        self.cost[index] = value
+        self.changed([index])
+
+    def set_costs(self, costs) -> None:
+        """Replaces the terrain costs, clipping them to 1 to 255."""
+        self.cost[:] = np.clip(np.asarray(costs).reshape(self.size), 1, 255)
+        self.changed(None)
+
+    def build_adjacency(self) -> None:
+        """Recomputes the adjacency index of every cell from the obstacle layout."""
+        free = ~self.obstruction.reshape(self.height, self.width)
+        adjacency = np.zeros((self.height, self.width), dtype=np.uint8)
+
+        for k, (di, dj) in enumerate(DIRECTIONS):
+
+            # Cells whose neighbour in this direction lies on the board
+            rows = slice(max(0, -di), self.height - max(0, di))
+            columns = slice(max(0, -dj), self.width - max(0, dj))
+            shifted = free[
+                rows.start + di : rows.stop + di, columns.start + dj : columns.stop + dj
+            ]
+            adjacency[rows, columns] |= shifted.astype(np.uint8) << k
+
+        self.adjacency[:] = adjacency.reshape(self.size)
+
+    def clear_search(self) -> None:
+        """
+        Forgets everything a previous search wrote, keeping start and end, by
+        moving on to a new generation and clearing the search flags.
+        """
+        self.generation += 1
+
+        # Once the counter wraps around, old stamps could pass for new ones
+        if self.generation > np.iinfo(self.stamp.dtype).max:
+            self.stamp.fill(0)
+            self.generation = 1
+
+        self.state &= START | END
+
+    def visit(self, index: int) -> None:
+        """
+        Stamps a cell with the current generation, giving it the values of a
+        cell no search has touched yet.
+        """
+        self.stamp[index] = self.generation
+        self.g[index] = 0
+        self.f[index] = 0
+        self.parent_index[index] = -1
+
+    def visited(self, index: int) -> bool:
+        """Whether g, f and parent_index hold values of the current search for the cell."""
+        return bool(self.stamp[index] == self.generation)
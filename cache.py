@@ -0,0 +1,118 @@
+"""
+Bounded cache of search results. Entries are keyed by a fingerprint of the
+obstacle layout and terrain costs together with the algorithm and the
+endpoints, so an edit to the board changes the key of every query and stale
+results can never be returned, while undoing the edit makes them valid again.
+"""
+import numpy as np
+
+from collections import OrderedDict
+
+
+def cell_keys(indices) -> np.ndarray:
+    """
+    Pseudo-random 64 bit keys for cells, from the splitmix64 finaliser of their
+    index, so that no table of keys has to be stored.
+    """
+    with np.errstate(over="ignore"):
+        z = np.asarray(indices, dtype=np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return z ^ (z >> np.uint64(31))
+
+
+class PathCache:
+    """LRU cache of Results for queries on a Board, with hit and miss counters."""
+
+    def __init__(self, board, capacity: int = 256):
+
+        self.board = board
+        self.capacity = capacity
+        self.entries = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+        # XOR of the keys of every cell that is obstructed or costs more than 1,
+        # kept up to date by the listener, which compares with the layout as it
+        # was last hashed to tell what an edit changed
+        self.fingerprint = 0
+        self.layout = None
+        self.rehash()
+        board.subscribe(self.invalidate)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def cells(self, indices=None) -> np.ndarray:
+        """
+        Codes for the cells, the terrain cost shifted past the obstruction bit,
+        with 0 for a plain free cell, which does not count towards the fingerprint.
+        """
+        board = self.board
+        if indices is None:
+            cost, obstruction = board.cost, board.obstruction
+        else:
+            cost, obstruction = board.cost[indices], board.obstruction[indices]
+        return (cost.astype(np.uint64) - 1) << np.uint64(1) | obstruction
+
+    def keys(self, indices, codes) -> np.ndarray:
+        """Keys of cells in the given states, plain free cells having none."""
+        keys = cell_keys(np.asarray(indices, dtype=np.uint64) << np.uint64(9) | codes)
+        return np.where(codes != 0, keys, np.uint64(0))
+
+    def rehash(self) -> None:
+        """Recomputes the fingerprint of the whole layout."""
+        self.layout = self.cells()
+        marked = np.flatnonzero(self.layout)
+        keys = self.keys(marked, self.layout[marked])
+        self.fingerprint = int(np.bitwise_xor.reduce(keys, initial=np.uint64(0)))
+
+    def invalidate(self, indices) -> None:
+        """
+        Board listener. Each edited cell swaps the key of its old state for the
+        key of its new one in the fingerprint, which retires every entry made
+        for the previous layout. A whole new layout empties the cache, as its
+        old entries are unlikely to be wanted again.
+        """
+        if indices is None:
+            self.entries.clear()
+            self.rehash()
+            return
+
+        indices = np.asarray(indices)
+        codes = self.cells(indices)
+        changes = self.keys(indices, self.layout[indices]) ^ self.keys(indices, codes)
+        self.fingerprint ^= int(np.bitwise_xor.reduce(changes, initial=np.uint64(0)))
+        self.layout[indices] = codes
+
+    def key(self, algorithm: str, start: tuple, end: tuple) -> tuple:
+        return self.fingerprint, algorithm, tuple(start), tuple(end)
+
+    def get(self, algorithm: str, start: tuple, end: tuple):
+        """Returns the cached Result for the query, or None."""
+        key = self.key(algorithm, start, end)
+        result = self.entries.get(key)
+
+        if result is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return result
+
+    def put(self, algorithm: str, start: tuple, end: tuple, result) -> None:
+        """Stores a Result, evicting the least recently used entry when full."""
+        key = self.key(algorithm, start, end)
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drops every entry and resets the counters."""
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,163 @@
+"""
+Incremental replanning with D* Lite. The planner searches backwards from the
+goal and keeps its g and rhs values between queries, so when cells are
+obstructed or cleared only the part of the search tree they affect is repaired.
+"""
+from math import sqrt
+from utils import IndexedHeap
+
+
+INFINITY = float("inf")
+
+# Keys this close to the start's still get expanded, so that rounding in the
+# path costs cannot stop the search one cell short
+TOLERANCE = 1e-9
+
+
+class DStarLite:
+    """D* Lite planner for one goal on a Board."""
+
+    def __init__(self, board, start: int, goal: int):
+
+        self.board = board
+        self.start = start
+        self.goal = goal
+
+        # Cells edited since the last replan, or None after a whole new layout
+        self.edits = set()
+        board.subscribe(self.notice)
+
+        self.reset()
+
+    def reset(self) -> None:
+        """Throws the search tree away and starts again from the goal."""
+        self.g = {}
+        self.rhs = {self.goal: 0.0}
+        self.km = 0.0
+        self.last = self.start
+
+        self.queue = IndexedHeap()
+        self.queue.push(self.goal, self.key(self.goal))
+
+    def close(self) -> None:
+        """Stops listening to the board."""
+        self.board.unsubscribe(self.notice)
+
+    def notice(self, indices) -> None:
+        """Board listener queueing edits for the next replan."""
+        if indices is None or self.edits is None:
+            self.edits = None
+        else:
+            self.edits.update(indices)
+
+    def heuristic(self, a: int, b: int) -> float:
+        """Octile distance between two cells."""
+        (ai, aj), (bi, bj) = self.board.coords(a), self.board.coords(b)
+        di, dj = abs(ai - bi), abs(aj - bj)
+        return sqrt(2) * min(di, dj) + abs(di - dj)
+
+    def key(self, cell: int) -> tuple:
+        best = min(self.g.get(cell, INFINITY), self.rhs.get(cell, INFINITY))
+        return (best + self.heuristic(self.start, cell) + self.km, best)
+
+    def successors(self, cell: int) -> list:
+        """Free neighbours with their step costs, none if the cell itself is blocked."""
+        board = self.board
+        if board.obstruction[cell]:
+            return []
+        return [(cell + offset, cost) for offset, cost in board.moves[board.adjacency[cell]]]
+
+    def update_vertex(self, cell: int) -> None:
+        """Recomputes the rhs of a cell and requeues it if it became inconsistent."""
+        if cell != self.goal:
+            self.rhs[cell] = min(
+                (cost + self.g.get(successor, INFINITY) for successor, cost in self.successors(cell)),
+                default=INFINITY,
+            )
+
+        if cell in self.queue:
+            self.queue.remove(cell)
+        if self.g.get(cell, INFINITY) != self.rhs.get(cell, INFINITY):
+            self.queue.push(cell, self.key(cell))
+
+    def move_start(self, start: int) -> None:
+        """Moves the start, keeping the search tree valid."""
+        self.km += self.heuristic(self.last, start)
+        self.last = start
+        self.start = start
+
+    def compute(self, solver=None):
+        """
+        Expands inconsistent cells until the start is consistent and settled,
+        yielding each cell once its expansion is complete.
+        """
+        g, rhs = self.g, self.rhs
+
+        def settled() -> bool:
+            limit, _ = self.key(self.start)
+            return self.queue.peek()[1][0] > limit + TOLERANCE
+
+        while self.queue and (
+            not settled()
+            or rhs.get(self.start, INFINITY) != g.get(self.start, INFINITY)
+        ):
+            cell, old_key = self.queue.peek()
+            new_key = self.key(cell)
+
+            if old_key < new_key:
+                self.queue.push(cell, new_key)
+                continue
+
+            self.queue.pop()
+            if solver is not None:
+                solver.close_cell(cell)
+
+            if g.get(cell, INFINITY) > rhs.get(cell, INFINITY):
+                g[cell] = rhs[cell]
+                affected = [neighbour for neighbour, _ in self.successors(cell)]
+            else:
+                g[cell] = INFINITY
+                affected = [neighbour for neighbour, _ in self.successors(cell)] + [cell]
+
+            for neighbour in affected:
+                if solver is not None and neighbour not in self.queue:
+                    solver.open_cell(neighbour)
+                self.update_vertex(neighbour)
+
+            yield cell
+
+    def replan(self, solver=None):
+        """
+        Repairs the search tree after any edits, as a generator yielding each
+        cell expanded, and returns the path from the start to the goal as cell
+        indices, or None if there is none.
+        """
+        board = self.board
+
+        if self.edits is None:
+            self.reset()
+        else:
+            for index in self.edits:
+                i, j = board.coords(index)
+                for di in (-1, 0, 1):
+                    for dj in (-1, 0, 1):
+                        if 0 <= i + di < board.height and 0 <= j + dj < board.width:
+                            self.update_vertex(index + di * board.width + dj)
+        self.edits = set()
+
+        yield from self.compute(solver)
+
+        if self.g.get(self.start, INFINITY) == INFINITY:
+            return None
+
+        # Follow the cheapest successor down to the goal
+        path = [self.start]
+        while path[-1] != self.goal and len(path) <= board.size:
+            path.append(
+                min(
+                    self.successors(path[-1]),
+                    key=lambda step: step[1] + self.g.get(step[0], INFINITY),
+                )[0]
+            )
+
+        return path
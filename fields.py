@@ -0,0 +1,230 @@
+"""
+Distance fields rooted at a goal. A single reverse Djikstra's search from the
+goal gives every cell its distance to the goal and the direction of its next
+step towards it, after which the cheapest path from any start is read off in
+time proportional to its length, with no search at all. Fields are kept in a
+FieldStore with a memory budget, which throws away any field an edit to the
+board might have made wrong.
+"""
+import numpy as np
+
+from collections import OrderedDict
+from math import sqrt
+from board import DIRECTIONS
+
+
+# Next step of cells that have none: the goal and unreachable cells
+NONE = 255
+
+# Default memory budget of a FieldStore, in bytes
+MEMORY = 64 * 2**20
+
+
+class DistanceField:
+    """
+    Distances to a goal, as float32 with infinity for unreachable cells, and
+    for every cell the index into DIRECTIONS of its next step towards it.
+    """
+
+    def __init__(self, board, goal: int):
+
+        self.board = board
+        self.goal = goal
+        self.distance = np.full(board.size, np.inf, dtype=np.float32)
+        self.hops = np.full(board.size, NONE, dtype=np.uint8)
+
+    @property
+    def nbytes(self) -> int:
+        return self.distance.nbytes + self.hops.nbytes
+
+    def reachable(self, index: int) -> bool:
+        return bool(np.isfinite(self.distance[index]))
+
+    def path(self, start: int):
+        """Follows the next steps from start to the goal, returning cell indices or None."""
+        if not self.reachable(start):
+            return None
+
+        width = self.board.width
+        offsets = [di * width + dj for di, dj in DIRECTIONS]
+        hops = self.hops
+
+        path = [start]
+        while path[-1] != self.goal:
+            path.append(path[-1] + offsets[hops[path[-1]]])
+        return path
+
+    def build(self, solver=None):
+        """
+        Fills in the field with a reverse Djikstra's search from the goal, run
+        with the same ring of buckets as Solver.dial. A move into a cell costs
+        that cell's terrain, so going backwards a cell is charged the cost of
+        the one it was reached from. This is a generator, yielding each cell
+        once it is settled. The solver, if given, is told about every cell
+        that is opened or settled.
+        """
+        board = self.board
+        terrain = board.cost
+        distance, hops = self.distance, self.hops
+
+        # Like board.moves, with the index into DIRECTIONS of each move as well
+        moves = [
+            [
+                (k, di * board.width + dj, sqrt(2) if di and dj else 1.0)
+                for k, (di, dj) in enumerate(DIRECTIONS)
+                if bits >> k & 1
+            ]
+            for bits in range(256)
+        ]
+
+        width = board.min_cost()
+        count = int(sqrt(2) * int(terrain.max()) / width) + 2
+        buckets = [[] for _ in range(count)]
+
+        g = {self.goal: 0.0}
+        settled = set()
+        buckets[0].append(self.goal)
+        pending = 1
+        position = 0
+        if solver is not None:
+            solver.open_cell(self.goal, True)
+
+        while pending:
+
+            bucket = buckets[position % count]
+            if not bucket:
+                position += 1
+                continue
+
+            current = bucket.pop()
+            pending -= 1
+            if current in settled:
+                if solver is not None:
+                    solver.discarded += 1
+                continue
+
+            settled.add(current)
+            distance[current] = g[current]
+            if solver is not None:
+                solver.close_cell(current, True)
+
+            # Stepping from the neighbour into current costs current's terrain
+            entering = int(terrain[current])
+            for k, offset, cost in moves[board.adjacency[current]]:
+                neighbour = current + offset
+                if neighbour in settled:
+                    continue
+
+                new_distance = g[current] + cost * entering
+                if neighbour in g and new_distance >= g[neighbour]:
+                    continue
+
+                if solver is not None:
+                    if neighbour in g:
+                        solver.reopened += 1
+                    else:
+                        solver.open_cell(neighbour, True)
+
+                # The neighbour steps back along the opposite direction
+                g[neighbour] = new_distance
+                hops[neighbour] = 7 - k
+                buckets[int(new_distance / width) % count].append(neighbour)
+                pending += 1
+
+            yield current
+
+        return self
+
+    def still_valid(self, index: int) -> bool:
+        """
+        Whether the field survives an edit to a cell, patching it if needed. A
+        newly blocked cell that no other cell steps through only loses its own
+        distance. A freed or re-costed cell can only matter if it, or one of
+        its neighbours, was reachable.
+        """
+        board = self.board
+        i, j = board.coords(index)
+        neighbours = [
+            (k, index + di * board.width + dj)
+            for k, (di, dj) in enumerate(DIRECTIONS)
+            if 0 <= i + di < board.height and 0 <= j + dj < board.width
+        ]
+
+        if board.obstruction[index]:
+            if index == self.goal:
+                return False
+            if any(self.hops[neighbour] == 7 - k for k, neighbour in neighbours):
+                return False
+            self.distance[index] = np.inf
+            self.hops[index] = NONE
+            return True
+
+        return not (self.reachable(index) or any(self.reachable(neighbour) for _, neighbour in neighbours))
+
+
+class FieldStore:
+    """
+    Distance fields by goal, least recently used first, holding no more than
+    budget bytes between them. Fields are dropped as soon as an edit to the
+    board could have changed them.
+    """
+
+    def __init__(self, board, budget: int = MEMORY):
+
+        self.board = board
+        self.budget = budget
+        self.fields = OrderedDict()
+        self.nbytes = 0
+
+        self.hits = 0
+        self.misses = 0
+
+        board.subscribe(self.invalidate)
+
+    def __len__(self) -> int:
+        return len(self.fields)
+
+    def get(self, goal: int):
+        """Returns the stored field for the goal, or None."""
+        field = self.fields.get(goal)
+        if field is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.fields.move_to_end(goal)
+        return field
+
+    def build(self, goal: int, solver=None):
+        """
+        Builds the field for the goal and stores it, evicting the least recently
+        used fields to stay within the budget. A generator, like DistanceField.build.
+        """
+        field = DistanceField(self.board, goal)
+        yield from field.build(solver)
+
+        if field.nbytes <= self.budget:
+            self.fields[goal] = field
+            self.nbytes += field.nbytes
+            while self.nbytes > self.budget:
+                self.drop(next(iter(self.fields)))
+
+        return field
+
+    def drop(self, goal: int) -> None:
+        self.nbytes -= self.fields.pop(goal).nbytes
+
+    def invalidate(self, indices) -> None:
+        """Board listener, dropping every field the edited cells might have changed."""
+        if indices is None:
+            self.fields.clear()
+            self.nbytes = 0
+            return
+
+        for goal in list(self.fields):
+            if not all(self.fields[goal].still_valid(int(index)) for index in indices):
+                self.drop(goal)
+
+    def close(self) -> None:
+        """Stops listening to the board."""
+        self.board.unsubscribe(self.invalidate)
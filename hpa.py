@@ -0,0 +1,333 @@
+"""
+Hierarchical pathfinding (HPA*). The board is split into square clusters, and
+the free cells on either side of each cluster border become entrance nodes of a
+small abstract graph, joined by the shortest distances inside each cluster.
+Queries search the abstract graph and only refine the segments they use. Edits
+to the board mark the clusters they touch, which are rebuilt before the next
+query.
+"""
+import heapq
+
+from math import ceil, dist, sqrt
+from utils import IndexedHeap
+
+
+# Entrances at least this long get a transition at each end instead of the middle
+LONG_ENTRANCE = 6
+
+
+class ClusterMap:
+    """The abstract graph of entrances over the clusters of a Board."""
+
+    def __init__(self, board, cluster_size: int = 10):
+
+        self.board = board
+        self.cluster_size = cluster_size
+        self.rows = ceil(board.height / cluster_size)
+        self.columns = ceil(board.width / cluster_size)
+
+        # Transitions (a, b, cost) between neighbouring clusters, per border
+        self.borders = {}
+
+        # Entrance links across borders and inside clusters, as node -> {node: cost}
+        self.links = {}
+        self.intra = {}
+
+        # Clusters whose borders and distances are out of date
+        self.dirty = {(r, c) for r in range(self.rows) for c in range(self.columns)}
+        board.subscribe(self.invalidate)
+
+    def cluster(self, index: int) -> tuple:
+        """Returns the (row, column) of the cluster containing the cell."""
+        i, j = self.board.coords(index)
+        return i // self.cluster_size, j // self.cluster_size
+
+    def bounds(self, cluster: tuple) -> tuple:
+        """Returns the first and last rows and columns of the cluster, inclusive."""
+        size = self.cluster_size
+        r, c = cluster
+        return (
+            r * size,
+            min((r + 1) * size, self.board.height) - 1,
+            c * size,
+            min((c + 1) * size, self.board.width) - 1,
+        )
+
+    def invalidate(self, indices) -> None:
+        """Board listener marking the clusters affected by an edit."""
+        if indices is None:
+            self.dirty.update((r, c) for r in range(self.rows) for c in range(self.columns))
+            return
+
+        for index in indices:
+            i, j = self.board.coords(index)
+
+            # A cell on a border also changes the clusters it borders
+            for di in (-1, 0, 1):
+                for dj in (-1, 0, 1):
+                    if 0 <= i + di < self.board.height and 0 <= j + dj < self.board.width:
+                        self.dirty.add(((i + di) // self.cluster_size, (j + dj) // self.cluster_size))
+
+    def sides(self, key: tuple) -> tuple:
+        """Returns the two clusters joined by a border."""
+        kind, r, c = key
+        if kind == "h":
+            return (r, c), (r, c + 1)
+        if kind == "v":
+            return (r, c), (r + 1, c)
+        if kind == "d":
+            return (r, c), (r + 1, c + 1)
+        return (r, c + 1), (r + 1, c)
+
+    def border_keys(self, cluster: tuple) -> list:
+        """
+        Returns the borders touching the cluster. A border key names its kind
+        and the cluster at its top left: "h" joins (r, c) to (r, c + 1), "v" joins
+        (r, c) to (r + 1, c), "d" joins (r, c) to (r + 1, c + 1) at the corner and
+        "a" joins (r, c + 1) to (r + 1, c).
+        """
+        r, c = cluster
+        keys = [
+            ("h", r, c), ("h", r, c - 1),
+            ("v", r, c), ("v", r - 1, c),
+            ("d", r, c), ("d", r - 1, c - 1),
+            ("a", r, c - 1), ("a", r - 1, c),
+        ]
+        return [
+            key for key in keys
+            if 0 <= key[1] < self.rows - (key[0] != "h") and 0 <= key[2] < self.columns - (key[0] != "v")
+        ]
+
+    def transitions(self, key: tuple) -> list:
+        """Finds the transitions (a, b, cost) across a border."""
+        board = self.board
+        size = self.cluster_size
+        kind, r, c = key
+
+        def free(i: int, j: int) -> bool:
+            return 0 <= i < board.height and 0 <= j < board.width and not board.obstruction[i * board.width + j]
+
+        # Single cells meeting diagonally at a corner
+        if kind in "da":
+            i = (r + 1) * size - 1
+            j = (c + 1) * size - 1 if kind == "d" else (c + 1) * size
+            k = j + 1 if kind == "d" else j - 1
+            if free(i, j) and free(i + 1, k):
+                return [(board.index(i, j), board.index(i + 1, k), sqrt(2))]
+            return []
+
+        # Otherwise walk along the border, with cell (along, 0) on the first
+        # cluster's side and (along, 1) on the second's
+        if kind == "h":
+            first, last, _, line = self.bounds((r, c))
+            cell = lambda along, side: (along, line + side)
+        else:
+            _, line, first, last = self.bounds((r, c))
+            cell = lambda along, side: (line + side, along)
+
+        transitions = []
+        run = []
+
+        # Entrances are runs of free cells facing each other across the border,
+        # each side of a run being connected along the border
+        for along in range(first, last + 2):
+            if along <= last and free(*cell(along, 0)) and free(*cell(along, 1)):
+                run.append(along)
+                continue
+            if not run:
+                continue
+
+            chosen = [run[0], run[-1]] if len(run) >= LONG_ENTRANCE else [run[len(run) // 2]]
+            for position in chosen:
+                transitions.append((board.index(*cell(position, 0)), board.index(*cell(position, 1)), 1.0))
+            run = []
+
+        # Diagonal steps across the border that no straight entrance next to them covers
+        for along in range(first, last + 1):
+            if not free(*cell(along, 0)) or free(*cell(along, 1)):
+                continue
+            for other in (along - 1, along + 1):
+                if first <= other <= last and free(*cell(other, 1)) and not free(*cell(other, 0)):
+                    transitions.append((board.index(*cell(along, 0)), board.index(*cell(other, 1)), sqrt(2)))
+
+        return transitions
+
+    def local_search(self, source: int, cluster: tuple, targets=None) -> tuple:
+        """
+        Djikstra's restricted to the cells of one cluster. Stops early once all
+        targets are settled, returning the distance and parent dictionaries.
+        """
+        board = self.board
+        top, bottom, left, right = self.bounds(cluster)
+        remaining = set(targets) if targets is not None else None
+
+        distance = {source: 0.0}
+        parent = {source: None}
+        queue = [(0.0, source)]
+        settled = set()
+
+        while queue:
+            current_distance, current = heapq.heappop(queue)
+            if current in settled:
+                continue
+            settled.add(current)
+
+            if remaining is not None:
+                remaining.discard(current)
+                if not remaining:
+                    break
+
+            for offset, cost in board.moves[board.adjacency[current]]:
+                neighbour = current + offset
+                i, j = divmod(neighbour, board.width)
+                if not (top <= i <= bottom and left <= j <= right):
+                    continue
+
+                new_distance = current_distance + cost
+                if new_distance < distance.get(neighbour, float("inf")):
+                    distance[neighbour] = new_distance
+                    parent[neighbour] = current
+                    heapq.heappush(queue, (new_distance, neighbour))
+
+        return distance, parent
+
+    def nodes(self, cluster: tuple) -> set:
+        """Returns the entrance nodes that lie inside the cluster."""
+        nodes = set()
+        for key in self.border_keys(cluster):
+            for a, b, _ in self.borders.get(key, []):
+                nodes.update(node for node in (a, b) if self.cluster(node) == cluster)
+        return nodes
+
+    def refresh(self) -> None:
+        """Rebuilds the borders and intra-cluster distances of the dirty clusters."""
+        if not self.dirty:
+            return
+
+        # Recompute every border touching a dirty cluster
+        keys = {key for cluster in self.dirty for key in self.border_keys(cluster)}
+        affected = set(self.dirty)
+
+        for key in keys:
+            for a, b, _ in self.borders.get(key, []):
+                self.links.get(a, {}).pop(b, None)
+                self.links.get(b, {}).pop(a, None)
+
+            self.borders[key] = self.transitions(key)
+            for a, b, cost in self.borders[key]:
+                self.links.setdefault(a, {})[b] = cost
+                self.links.setdefault(b, {})[a] = cost
+
+            # Clusters on the far side of a rebuilt border may have lost or gained nodes
+            affected.update(self.sides(key))
+
+        for cluster in affected:
+            nodes = self.nodes(cluster)
+            edges = {}
+            for node in nodes:
+                distance, _ = self.local_search(node, cluster, nodes)
+                edges[node] = {other: distance[other] for other in nodes if other != node and other in distance}
+            self.intra[cluster] = edges
+
+        self.dirty.clear()
+
+    def refine(self, a: int, b: int) -> list:
+        """Expands one abstract edge into the cells it stands for, excluding a."""
+        cluster = self.cluster(a)
+        if cluster != self.cluster(b):
+            return [b]
+
+        _, parent = self.local_search(a, cluster, [b])
+        path = [b]
+        while parent[path[-1]] != a:
+            path.append(parent[path[-1]])
+        path.reverse()
+        return path
+
+    def search(self, start: int, end: int, solver=None):
+        """
+        Finds a path between two cells through the abstract graph, returning the
+        refined list of cell indices, or None. This is a generator, yielding each
+        abstract node once it has been expanded. The solver, if given, is told
+        about every abstract node that is opened or expanded.
+        """
+        self.refresh()
+        board = self.board
+
+        def opened(index: int) -> None:
+            if solver is not None:
+                solver.open_cell(index)
+
+        def closed(index: int) -> None:
+            if solver is not None:
+                solver.close_cell(index)
+
+        start_cluster, end_cluster = self.cluster(start), self.cluster(end)
+
+        # A path that stays inside one cluster needs no abstraction
+        if start_cluster == end_cluster:
+            distance, _ = self.local_search(start, start_cluster, [end])
+            if end in distance:
+                return [start] + self.refine(start, end) if start != end else [start]
+
+        # Connect the start and end to the entrances of their clusters
+        starts = self.nodes(start_cluster)
+        distance, _ = self.local_search(start, start_cluster, starts)
+        from_start = {node: distance[node] for node in starts if node in distance and node != start}
+
+        ends = self.nodes(end_cluster)
+        distance, _ = self.local_search(end, end_cluster, ends)
+        to_end = {node: distance[node] for node in ends if node in distance and node != end}
+
+        goal = board.coords(end)
+        g = {start: 0.0}
+        parent = {start: None}
+        frontier = IndexedHeap()
+        frontier.push(start, dist(board.coords(start), goal))
+        opened(start)
+        expanded = set()
+
+        while frontier:
+            current, _ = frontier.pop()
+            expanded.add(current)
+            closed(current)
+
+            if current == end:
+                break
+
+            neighbours = dict(self.intra.get(self.cluster(current), {}).get(current, {}))
+            neighbours.update(self.links.get(current, {}))
+            if current == start:
+                neighbours.update(from_start)
+            if current in to_end:
+                neighbours[end] = to_end[current]
+
+            for neighbour, cost in neighbours.items():
+                if neighbour in expanded:
+                    continue
+
+                tentative_g_score = g[current] + cost
+                if neighbour in g and tentative_g_score >= g[neighbour]:
+                    continue
+
+                if neighbour not in g:
+                    opened(neighbour)
+                g[neighbour] = tentative_g_score
+                parent[neighbour] = current
+                frontier.push(neighbour, tentative_g_score + dist(board.coords(neighbour), goal))
+
+            yield current
+
+        if end not in expanded:
+            return None
+
+        # Walk back up the abstract path, then refine it segment by segment
+        abstract = [end]
+        while parent[abstract[-1]] is not None:
+            abstract.append(parent[abstract[-1]])
+        abstract.reverse()
+
+        path = [start]
+        for a, b in zip(abstract, abstract[1:]):
+            path += self.refine(a, b)
+        return path
@@ -0,0 +1,222 @@
+"""
+Loading and saving obstacle maps. Supported formats, chosen by extension:
+
+    .map    Moving AI benchmark maps (movingai.com/benchmarks)
+    .txt    plain text, one character per cell, '.' free and '#' wall
+    .png    images, dark pixels being walls
+    .npy    NumPy arrays, opened memory-mapped
+
+Masks are boolean arrays, True for a wall, which Grid.generate_maze and
+Board.from_mask accept directly. Moving AI scenario files (.scen) are read
+into Scenario objects so that whole benchmark sets can be run in bulk.
+
+Terrain costs, for Grid.generate_terrain and Board.set_costs, are kept
+separately as .npy integer arrays or as text grids of the digits 1 to 9.
+"""
+import mmap
+import os
+import numpy as np
+
+
+# Moving AI terrain that a ground unit can walk on: plain ground and swamp.
+# Trees, water and out of bounds cells are walls
+PASSABLE = np.zeros(256, dtype=bool)
+for character in b".GS":
+    PASSABLE[character] = True
+
+
+class Scenario:
+    """One query of a Moving AI scenario file, with (row, column) endpoints."""
+
+    def __init__(self, bucket: int, map_path: str, start: tuple, end: tuple, optimal: float):
+
+        self.bucket = bucket
+        self.map_path = map_path
+        self.start = start
+        self.end = end
+        self.optimal = optimal
+
+    def __repr__(self) -> str:
+        return f"Scenario(bucket={self.bucket}, map={self.map_path}, start={self.start}, end={self.end})"
+
+
+def read_movingai(path: str) -> np.ndarray:
+    """
+    Reads a Moving AI .map file. The file is memory-mapped and its rows decoded
+    with a lookup table in one vectorised pass, rather than line by line.
+    """
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+
+        # Header: type, height, width, then the map keyword on its own line
+        header = {}
+        position = 0
+        while True:
+            end = data.find(b"\n", position)
+            words = data[position:end].split()
+            position = end + 1
+            if words == [b"map"]:
+                break
+            header[words[0].decode()] = words[1].decode()
+
+        height, width = int(header["height"]), int(header["width"])
+
+        # Rows end in \n or \r\n, so the stride is measured from the first one
+        stride = data.find(b"\n", position) - position + 1
+        cells = np.frombuffer(data, dtype=np.uint8, count=min(height * stride, len(data) - position), offset=position)
+
+        # The last row may be missing its line ending
+        if len(cells) < height * stride:
+            cells = np.concatenate([cells, np.full(height * stride - len(cells), ord("\n"), dtype=np.uint8)])
+
+        mask = ~PASSABLE[cells.reshape(height, stride)[:, :width]]
+
+        # The map cannot be closed while an array still points into it
+        del cells
+        return mask
+
+
+def write_movingai(path: str, mask) -> None:
+    """Writes a mask as a Moving AI .map file, walls as '@'."""
+    mask = np.asarray(mask) != 0
+    rows = np.where(mask, ord("@"), ord(".")).astype(np.uint8)
+    rows = np.hstack([rows, np.full((mask.shape[0], 1), ord("\n"), dtype=np.uint8)])
+
+    with open(path, "wb") as file:
+        file.write(f"type octile\nheight {mask.shape[0]}\nwidth {mask.shape[1]}\nmap\n".encode())
+        file.write(rows.tobytes())
+
+
+def read_characters(path: str) -> np.ndarray:
+    """Reads a text grid as an array of character codes, padding short lines with spaces."""
+    with open(path) as file:
+        lines = [line.rstrip("\r\n") for line in file if line.strip()]
+
+    width = max(len(line) for line in lines)
+    cells = np.frombuffer("".join(line.ljust(width) for line in lines).encode(), dtype=np.uint8)
+    return cells.reshape(len(lines), width)
+
+
+def read_text(path: str) -> np.ndarray:
+    """
+    Reads a plain text grid, where '.', spaces and digits are free and anything
+    else is a wall. Digits are terrain costs, so a terrain grid is also a map.
+    """
+    return ~np.isin(read_characters(path), np.frombuffer(b". 0123456789", dtype=np.uint8))
+
+
+def write_text(path: str, mask) -> None:
+    """Writes a mask as a plain text grid of '#' and '.'."""
+    mask = np.asarray(mask) != 0
+    with open(path, "w") as file:
+        for row in mask:
+            file.write("".join("#" if cell else "." for cell in row) + "\n")
+
+
+def read_png(path: str) -> np.ndarray:
+    """Reads an image with one pixel per cell, pixels darker than mid grey being walls."""
+    import pygame
+
+    pixels = pygame.surfarray.array3d(pygame.image.load(path)).transpose(1, 0, 2)
+    return pixels.mean(axis=2) < 128
+
+
+def write_png(path: str, mask) -> None:
+    """Writes a mask as an image with black walls on white."""
+    import pygame
+
+    mask = np.asarray(mask) != 0
+    pixels = np.where(mask[..., None], 0, 255).astype(np.uint8).repeat(3, axis=2)
+    pygame.image.save(pygame.surfarray.make_surface(pixels.transpose(1, 0, 2)), path)
+
+
+def read_npy(path: str) -> np.ndarray:
+    """Opens a .npy array memory-mapped, so large maps are paged in rather than copied."""
+    return np.load(path, mmap_mode="r")
+
+
+def write_npy(path: str, mask) -> None:
+    """Writes a mask as a boolean .npy array."""
+    np.save(path, np.asarray(mask) != 0)
+
+
+READERS = {".map": read_movingai, ".txt": read_text, ".png": read_png, ".npy": read_npy}
+WRITERS = {".map": write_movingai, ".txt": write_text, ".png": write_png, ".npy": write_npy}
+
+
+def load(path: str) -> np.ndarray:
+    """Reads a map in the format given by its extension."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in READERS:
+        raise ValueError(f"unsupported map format: {path}")
+    return READERS[extension](path)
+
+
+def save(path: str, mask) -> None:
+    """Writes a map in the format given by its extension."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in WRITERS:
+        raise ValueError(f"unsupported map format: {path}")
+    WRITERS[extension](path, mask)
+
+
+def load_costs(path: str) -> np.ndarray:
+    """
+    Reads terrain costs from a .npy integer array, opened memory-mapped, or a
+    text grid where the digits 1 to 9 are costs and every other cell costs 1.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".npy":
+        return np.load(path, mmap_mode="r")
+    if extension == ".txt":
+        cells = read_characters(path).astype(np.int16) - ord("0")
+        return np.where((cells >= 1) & (cells <= 9), cells, 1).astype(np.uint8)
+    raise ValueError(f"unsupported terrain format: {path}")
+
+
+def save_costs(path: str, costs, mask=None) -> None:
+    """
+    Writes terrain costs as a .npy array, or as a text grid of digits, where
+    costs above 9 are written as 9 and walls from the mask, if given, as '#'.
+    """
+    costs = np.asarray(costs)
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == ".npy":
+        np.save(path, costs.astype(np.uint8))
+    elif extension == ".txt":
+        digits = np.minimum(costs, 9).astype(np.uint8) + ord("0")
+        if mask is not None:
+            digits = np.where(np.asarray(mask) != 0, ord("#"), digits).astype(np.uint8)
+        with open(path, "w") as file:
+            for row in digits:
+                file.write(row.tobytes().decode() + "\n")
+    else:
+        raise ValueError(f"unsupported terrain format: {path}")
+
+
+def load_scenarios(path: str) -> list:
+    """
+    Reads a Moving AI .scen file. Map paths are resolved against the scenario
+    file's directory, falling back to the bare file name next to it.
+    """
+    directory = os.path.dirname(path)
+    scenarios = []
+
+    with open(path) as file:
+        for line in file:
+            fields = line.split()
+            if len(fields) != 9:
+                # The version line, or a blank one
+                continue
+
+            bucket, map_name = int(fields[0]), fields[1]
+            start_x, start_y, end_x, end_y = (int(field) for field in fields[4:8])
+
+            map_path = os.path.join(directory, map_name)
+            if not os.path.exists(map_path):
+                map_path = os.path.join(directory, os.path.basename(map_name))
+
+            # Moving AI coordinates are (x, y), that is (column, row)
+            scenarios.append(Scenario(bucket, map_path, (start_y, start_x), (end_y, end_x), float(fields[8])))
+
+    return scenarios
@@ -0,0 +1,231 @@
+"""
+Seeded maze generators. Every generator returns a uint8 mask, 1 for a wall,
+ready for Grid.generate_maze or Board.from_mask, and the same seed always
+gives the same maze.
+
+The perfect mazes (backtracker, prim, kruskal) carve passages through a
+lattice of cells at odd coordinates, so any two open cells are connected.
+Caves are grown with a vectorised cellular automaton, and random fill
+scatters walls at a chosen density.
+"""
+import random
+import numpy as np
+
+
+def lattice(height: int, width: int) -> tuple:
+    """Returns a mask of walls and the number of lattice rows and columns in it."""
+    return np.ones((height, width), dtype=np.uint8), max((height - 1) // 2, 1), max((width - 1) // 2, 1)
+
+
+def backtracker(height: int, width: int, seed=None, **_) -> np.ndarray:
+    """Recursive backtracker, run with an explicit stack. Long, winding corridors."""
+    mask, rows, columns = lattice(height, width)
+    rng = random.Random(seed)
+    visited = bytearray(rows * columns)
+
+    stack = [0]
+    visited[0] = 1
+    mask[1, 1] = 0
+
+    while stack:
+        current = stack[-1]
+        r, c = divmod(current, columns)
+
+        options = []
+        if r > 0 and not visited[current - columns]:
+            options.append(current - columns)
+        if r < rows - 1 and not visited[current + columns]:
+            options.append(current + columns)
+        if c > 0 and not visited[current - 1]:
+            options.append(current - 1)
+        if c < columns - 1 and not visited[current + 1]:
+            options.append(current + 1)
+
+        if not options:
+            stack.pop()
+            continue
+
+        chosen = options[rng.randrange(len(options))]
+        visited[chosen] = 1
+        nr, nc = divmod(chosen, columns)
+
+        # Open the new cell and the wall between the two
+        mask[2 * nr + 1, 2 * nc + 1] = 0
+        mask[r + nr + 1, c + nc + 1] = 0
+        stack.append(chosen)
+
+    return mask
+
+
+def prim(height: int, width: int, seed=None, **_) -> np.ndarray:
+    """Randomised Prim's algorithm. Many short dead ends branching off everywhere."""
+    mask, rows, columns = lattice(height, width)
+    rng = random.Random(seed)
+    visited = bytearray(rows * columns)
+
+    def add_walls(cell: int) -> None:
+        r, c = divmod(cell, columns)
+        if r > 0:
+            frontier.append((cell, cell - columns))
+        if r < rows - 1:
+            frontier.append((cell, cell + columns))
+        if c > 0:
+            frontier.append((cell, cell - 1))
+        if c < columns - 1:
+            frontier.append((cell, cell + 1))
+
+    frontier = []
+    visited[0] = 1
+    mask[1, 1] = 0
+    add_walls(0)
+
+    while frontier:
+        # Take a random wall, swapping the last one into its place
+        position = rng.randrange(len(frontier))
+        frontier[position], frontier[-1] = frontier[-1], frontier[position]
+        cell, neighbour = frontier.pop()
+
+        if visited[neighbour]:
+            continue
+
+        visited[neighbour] = 1
+        (r, c), (nr, nc) = divmod(cell, columns), divmod(neighbour, columns)
+        mask[2 * nr + 1, 2 * nc + 1] = 0
+        mask[r + nr + 1, c + nc + 1] = 0
+        add_walls(neighbour)
+
+    return mask
+
+
+def kruskal(height: int, width: int, seed=None, **_) -> np.ndarray:
+    """Randomised Kruskal's algorithm, over walls shuffled up front with NumPy."""
+    mask, rows, columns = lattice(height, width)
+    rng = np.random.default_rng(seed)
+
+    # Every lattice cell is open, and each wall between two of them is a candidate
+    mask[1 : 2 * rows : 2, 1 : 2 * columns : 2] = 0
+    cells = np.arange(rows * columns).reshape(rows, columns)
+    walls = np.concatenate(
+        [
+            np.stack([cells[:, :-1].ravel(), cells[:, 1:].ravel()], axis=1),
+            np.stack([cells[:-1, :].ravel(), cells[1:, :].ravel()], axis=1),
+        ]
+    )
+    walls = walls[rng.permutation(len(walls))].tolist()
+
+    # Union-find with path halving
+    parent = list(range(rows * columns))
+
+    def find(cell: int) -> int:
+        while parent[cell] != cell:
+            parent[cell] = parent[parent[cell]]
+            cell = parent[cell]
+        return cell
+
+    for a, b in walls:
+        root_a, root_b = find(a), find(b)
+        if root_a == root_b:
+            continue
+        parent[root_a] = root_b
+        (r, c), (nr, nc) = divmod(a, columns), divmod(b, columns)
+        mask[r + nr + 1, c + nc + 1] = 0
+
+    return mask
+
+
+def regions(mask: np.ndarray) -> np.ndarray:
+    """
+    Labels the open cells by the region they belong to, moving in the same
+    eight directions as the searches. Regions are merged along every pair of
+    neighbouring open cells at once, then each label is made to point straight
+    at its root, until no pair disagrees. Walls are labelled -1.
+    """
+    height, width = mask.shape
+    free = (mask == 0).ravel()
+    labels = np.arange(height * width)
+    cells = labels.reshape(height, width)
+
+    # Pairs of neighbouring cells, each direction counted once
+    pairs = [
+        (cells[:, :-1], cells[:, 1:]),
+        (cells[:-1, :], cells[1:, :]),
+        (cells[:-1, :-1], cells[1:, 1:]),
+        (cells[:-1, 1:], cells[1:, :-1]),
+    ]
+    a = np.concatenate([first.ravel() for first, _ in pairs])
+    b = np.concatenate([second.ravel() for _, second in pairs])
+    joined = free[a] & free[b]
+    a, b = a[joined], b[joined]
+
+    while True:
+        label_a, label_b = labels[a], labels[b]
+        differ = label_a != label_b
+        if not differ.any():
+            break
+
+        # Hook the larger root of each disagreeing pair under the smaller
+        np.minimum.at(labels, np.maximum(label_a, label_b)[differ], np.minimum(label_a, label_b)[differ])
+
+        # Pointer jumping until every label is a root
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+
+    labels[~free] = -1
+    return labels.reshape(height, width)
+
+
+def largest_region(mask: np.ndarray) -> np.ndarray:
+    """Walls off every open region but the largest, so any two open cells are connected."""
+    labels = regions(mask)
+    if labels.max() < 0:
+        return mask
+
+    largest = np.argmax(np.bincount(labels[labels >= 0]))
+    return np.where(labels == largest, 0, 1).astype(np.uint8)
+
+
+def caves(height: int, width: int, seed=None, density: float = 0.45, steps: int = 5, **_) -> np.ndarray:
+    """
+    Cellular automaton caves. Starts from random fill, then repeatedly makes a
+    cell a wall when five or more of its eight neighbours are walls, or four
+    and it already was one, the edge of the board counting as wall. Only the
+    largest cave is kept open.
+    """
+    rng = np.random.default_rng(seed)
+    mask = (rng.random((height, width)) < density).astype(np.uint8)
+
+    for _ in range(steps):
+        padded = np.pad(mask, 1, constant_values=1)
+        walls = sum(
+            padded[1 + di : 1 + di + height, 1 + dj : 1 + dj + width]
+            for di in (-1, 0, 1)
+            for dj in (-1, 0, 1)
+            if di or dj
+        )
+        mask = ((walls >= 5) | ((walls == 4) & (mask == 1))).astype(np.uint8)
+
+    return largest_region(mask)
+
+
+def random_fill(height: int, width: int, seed=None, density: float = 0.3, **_) -> np.ndarray:
+    """Walls scattered independently at the given density."""
+    rng = np.random.default_rng(seed)
+    return (rng.random((height, width)) < density).astype(np.uint8)
+
+
+# Generators by the name used on the command line
+GENERATORS = {
+    "backtracker": backtracker,
+    "prim": prim,
+    "kruskal": kruskal,
+    "caves": caves,
+    "random": random_fill,
+}
+
+
+def generate(name: str, height: int, width: int, seed=None, **options) -> np.ndarray:
+    """Runs the named generator."""
+    return GENERATORS[name](height, width, seed, **options)
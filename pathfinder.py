@@ -1,40 +1,108 @@
+import time
 import pygame
 import numpy as np
-import heapq
 
-from math import dist
-from utils import flatten
+from contextlib import ExitStack
+
 from settings import *
+from board import Board, START, END, PATH, SEARCH
+from cache import PathCache
+from recording import Trace
+from renderer import BoardRenderer
+from solver import Solver, STEP
+from stats import SearchStats
+from viewport import Viewport
+
+
+def state_flag(bit: int) -> property:
+    """Exposes one bit of Board.state as a boolean attribute of a Node."""
+
+    def getter(self) -> bool:
+        return bool(self.board.state[self.index] & bit)
+
+    def setter(self, value: bool) -> None:
+        if getter(self) == bool(value):
+            return
+        if value:
+            self.board.state[self.index] |= bit
+        else:
+            self.board.state[self.index] &= ~bit & 0xFF
+        self.grid.renderer.mark(self.index)
+
+    return property(getter, setter)
 
 
 class Node:
     """
-    Node that will construct the grid and will be given information
-    so that the heuristics can be calculated
+    Lightweight view of a single cell of the Board, giving the GUI the
+    attributes it reads and writes while the data stays in the arrays
     """
 
-    def __init__(self, i: int, j: int):
+    def __init__(self, grid, i: int, j: int):
 
         # Initialise the coordinates
         self.i = i
         self.j = j
 
-        # Initialise the heuristic variables
-        self.f = 0.0
-        self.g = 0.0
-        self.h = 0.0
-
-        # Set the board parameters
-        self.start = False
-        self.end = False
-        self.obstruction = False
-
-        # Variable for the parent node
-        self.parent = None
-        self.path = False
-
-        # Give the node a rect variable so that it can interact
-        self.rect = None
+        # Point the node at its slot in the board arrays
+        self.grid = grid
+        self.board = grid.board
+        self.index = i * grid.width + j
+
+    start = state_flag(START)
+    end = state_flag(END)
+    path = state_flag(PATH)
+
+    @property
+    def obstruction(self) -> bool:
+        return bool(self.board.obstruction[self.index])
+
+    @obstruction.setter
+    def obstruction(self, value: bool) -> None:
+        if self.obstruction != bool(value):
+            self.board.set_obstruction(self.index, value)
+            self.grid.renderer.mark(self.index)
+
+    @property
+    def cost(self) -> int:
+        return int(self.board.cost[self.index])
+
+    @cost.setter
+    def cost(self, value: int) -> None:
+        if self.cost != value:
+            self.board.set_cost(self.index, value)
+            self.grid.renderer.mark(self.index)
+
+    # The search values of cells the latest search never reached are left
+    # over from earlier ones, so they read as those of an untouched cell
+
+    @property
+    def f(self) -> float:
+        return float(self.board.f[self.index]) if self.board.visited(self.index) else 0.0
+
+    @property
+    def g(self) -> float:
+        return float(self.board.g[self.index]) if self.board.visited(self.index) else 0.0
+
+    @property
+    def h(self) -> float:
+        return self.f - self.g
+
+    @property
+    def parent(self):
+        index = self.board.parent_index[self.index]
+        if index < 0 or not self.board.visited(self.index):
+            return None
+        return Node(self.grid, *self.board.coords(index))
+
+    @property
+    def rect(self) -> pygame.Rect:
+        return pygame.Rect(
+            self.grid.board_origin[0] + self.j * self.grid.cell_size,
+            self.grid.board_origin[1] + self.i * self.grid.cell_size,
+            self.grid.cell_size,
+            self.grid.cell_size,
+        )
 
     def __eq__(self, __o) -> bool:
         return (self.i == __o.i) and (self.j == __o.j)
@@ -42,21 +110,11 @@ class Node:
     def __ne__(self, __o) -> bool:
         return not (self == __o)
 
-    # Created only for Djikstra implementation
-    def __lt__(self, __o) -> bool:
-        return True
-
     def __hash__(self) -> int:
         return hash((self.i, self.j))
 
     def draw(self, board_origin: int, cell_size: int, screen: pygame.Surface) -> None:
         """Method that draws the rect for each node."""
-        self.rect = pygame.Rect(
-            board_origin[0] + self.j * cell_size,
-            board_origin[1] + self.i * cell_size,
-            cell_size,
-            cell_size,
-        )
         pygame.draw.rect(screen, WHITE, self.rect, 1)
 
     def fill(self, screen: pygame.Surface, colour: tuple) -> None:
@@ -67,10 +125,49 @@ class Node:
         return (self.i, self.j)
 
 
+class Row:
+    """A row of the grid, handing out Node views on demand."""
+
+    def __init__(self, grid, i: int):
+        self.grid = grid
+        self.i = i
+
+    def __len__(self) -> int:
+        return self.grid.width
+
+    def __getitem__(self, j: int) -> Node:
+        if not -self.grid.width <= j < self.grid.width:
+            raise IndexError("column out of range")
+        return Node(self.grid, self.i, j % self.grid.width)
+
+    def __iter__(self):
+        for j in range(self.grid.width):
+            yield Node(self.grid, self.i, j)
+
+
+class Cells:
+    """The rows of the grid, so that cells[i][j] keeps working without storing nodes."""
+
+    def __init__(self, grid):
+        self.grid = grid
+
+    def __len__(self) -> int:
+        return self.grid.height
+
+    def __getitem__(self, i: int) -> Row:
+        if not -self.grid.height <= i < self.grid.height:
+            raise IndexError("row out of range")
+        return Row(self.grid, i % self.grid.height)
+
+    def __iter__(self):
+        for i in range(self.grid.height):
+            yield Row(self.grid, i)
+
+
 class Grid:
-    """The grid, constructed of Node objects, that the visualiser will traverse."""
+    """The grid, backed by a Board of cell arrays, that the visualiser will traverse."""
 
-    def __init__(self, height, width, board_origin, cell_size, pin, flag):
+    def __init__(self, height, width, board_origin, cell_size, pin, flag, viewport=None):
 
         # Set the variables for the board
         self.height = height
@@ -83,316 +180,238 @@ class Grid:
         self.flag = flag
 
         # Create the grid
-        self.cells = []
-        for i in range(height):
-            row = []
-            for j in range(width):
-                row.append(Node(i, j))
-            self.cells.append(row)
+        self.board = Board(height, width)
+        self.cells = Cells(self)
+
+        # Large boards are drawn through a camera over a viewport of the given size
+        if viewport is None:
+            self.renderer = BoardRenderer(self.board, board_origin, cell_size, pin, flag)
+        else:
+            self.renderer = Viewport(self.board, board_origin, viewport, pin, flag)
+
+        # Kept for the lifetime of the grid, so that state built for one search,
+        # such as the cluster abstraction, carries over to the next
+        self.solver = Solver(self.board, observer=self.observe)
+
+        # Results of earlier queries on the same layout
+        self.cache = PathCache(self.board)
+
+        # When recording, the Trace of the latest search
+        self.recording = False
+        self.trace = None
+
+        # SearchStats of the latest search, the StatsLog they are streamed to if
+        # any, and hooks entered around every search, such as profilers
+        self.stats = None
+        self.log = None
+        self.hooks = []
+        self.hooked = None
+
+        # The search being advanced step by step, if any, with its query, the
+        # steps taken so far, and the time spent searching and drawing
+        self.steps = None
+        self.query = None
+        self.taken = 0
+        self.search_time = 0.0
+        self.render_time = 0.0
 
         self.start = None
         self.end = None
+        self.result = None
+
+    def node(self, index: int) -> Node:
+        """Returns the node for a flat cell index."""
+        return Node(self, *self.board.coords(index))
 
-        # Set frontier and searched
-        self.open = []
-        self.closed = []
+    def node_at(self, pos: tuple):
+        """Returns the node under a screen position, or None."""
+        index = self.renderer.cell_at(pos)
+        if index is None:
+            return None
+        return self.node(index)
 
     def generate_maze(self, mask: np.ndarray) -> None:
-        """Randomly generates a maze on the GUI"""
+        """Applies the obstacle mask to the board"""
+        mask = np.asarray(mask).reshape(self.board.size) == 1
+        self.renderer.mark_all(np.flatnonzero(mask != self.board.obstruction))
+        self.board.set_mask(mask)
 
-        for i, row in enumerate(self.cells):
-            for j, node in enumerate(row):
-                if mask[i][j] == 1:
-                    node.obstruction = True
+    def generate_terrain(self, costs: np.ndarray) -> None:
+        """Applies a layer of terrain costs to the board"""
+        costs = np.clip(np.asarray(costs).reshape(self.board.size), 1, 255)
+        self.renderer.mark_all(np.flatnonzero(costs != self.board.cost))
+        self.board.set_costs(costs)
 
-    def get_neigbours(self, node: Node) -> list:
+    def draw_board(self) -> None:
+        """Brings the board up to date on the screen"""
+        began = time.perf_counter()
+        self.renderer.draw(self.screen)
+        self.render_time += time.perf_counter() - began
+
+    def observe(self, event: int, index: int) -> None:
+        """Mirrors the progress of the solver on the board."""
+        if self.trace is not None:
+            self.trace.record(event, index)
+        self.renderer.mark(index)
+
+    @property
+    def searching(self) -> bool:
+        """Whether a search has been started and not yet finished or cancelled."""
+        return self.steps is not None
+
+    def begin(self, algorithm: str) -> None:
         """
-        Returns a set of nodes that are vertically, horizontally, and diagonally adjacent to the node.
+        Starts the named algorithm on the headless solver, to be run with
+        advance, unless the same query was already answered on the current
+        layout, in which case the result is ready straight away.
         """
-        neighbours = []
-
-        for i in range(node.i - 1, node.i + 2):
-            for j in range(node.j - 1, node.j + 2):
-
-                # Check it falls within the grid
-                if 0 <= i < self.height and 0 <= j < self.width:
-
-                    # Define a Node variable called neighbour
-                    neighbour = self.cells[i][j]
-
-                    # Ignore the cell itself
-                    if neighbour != node and not neighbour.obstruction:
-                        neighbours.append(neighbour)
-
-        return neighbours
-
-    def g_heuristic(self, node: Node) -> None:
+        start, end = self.start.coords(), self.end.coords()
+
+        # Cells coloured by a previous search need repainting once it is cleared
+        self.renderer.mark_all(np.flatnonzero(self.board.state & SEARCH))
+
+        # A recording needs the exploration, so it always runs the search
+        self.trace = None
+        self.result = None if self.recording else self.cache.get(algorithm, start, end)
+        if self.result is not None:
+            self.board.clear_search()
+            self.record_stats(SearchStats(algorithm, start, end, self.result, cached=True))
+            return
+
+        if self.recording:
+            mask = self.board.obstruction.reshape(self.height, self.width)
+            self.trace = Trace(mask, start, end, algorithm)
+
+        # Hooks stay entered until the search finishes or is cancelled
+        self.hooked = ExitStack()
+        for hook in self.hooks:
+            self.hooked.enter_context(hook(algorithm))
+
+        self.query = algorithm, start, end
+        self.search_time = 0.0
+        self.render_time = 0.0
+        self.steps = self.solver.steps(algorithm, start, end)
+        self.taken = 0
+
+    def advance(self, count: int = None, budget: float = None) -> bool:
         """
-        Calculates the Manhattan distance for the greedy algorithm
-        and assigns it to the node.g variable.
+        Runs up to count more steps of the search, or all that are left, giving
+        up early once budget seconds have passed. Returns whether it finished.
         """
-        node.h = abs(node.i - self.end.i) + abs(node.j - self.end.j)
-
-    def draw_board(self) -> None:
-        """Updates the board and the colours of the rects"""
-        for row in self.cells:
-            for node in row:
-                node.draw(self.board_origin, self.cell_size, self.screen)
-
-                if node.obstruction:
-                    node.fill(self.screen, WHITE)
-                elif node.start:
-                    self.screen.blit(self.pin, node.rect)
-                elif node.end:
-                    self.screen.blit(self.flag, node.rect)
-                elif node in self.closed:
-                    node.fill(self.screen, RED)
-                elif node in self.open:
-                    node.fill(self.screen, GREEN)
-
-    def asearch(self) -> bool:
-        """A* search algorithm."""
-
-        # Append the starting node to the open list
-        self.open.append(self.start)
+        if self.steps is None:
+            return True
 
-        while self.open:
+        began = time.perf_counter()
+        taken = 0
 
-            # Set the current node to the node with the smallest f value
-            current = self.open[0]
-            current_index = 0
-            for index, node in enumerate(self.open):
-                if node.f < current.f:
-                    current = node
-                    current_index = index
+        try:
+            while count is None or taken < count:
+                self.observe(STEP, next(self.steps))
+                taken += 1
 
-            # Remove current from the grid.open
-            self.open.pop(current_index)
+                # Checking the clock every step would cost more than the steps
+                if budget is not None and not taken % 64 and time.perf_counter() - began > budget:
+                    break
 
-            # Append current to grid.closed
-            self.closed.append(current)
+        except StopIteration as done:
+            self.search_time += time.perf_counter() - began
+            self.taken += taken
+            self.complete(done.value)
+            return True
 
-            # Check current node is the goal
-            if current == self.end:
-
-                # Break while loop
-                return True
-
-            # Generate the neighbours
-            neighbours = self.get_neigbours(current)
-
-            for neighbour in neighbours:
-
-                # Check whether neighbour has been searched
-                if neighbour in self.closed:
-                    continue
-
-                tentative_g_score = current.g + dist(
-                    current.coords(), neighbour.coords()
-                )
-
-                if neighbour not in self.open:
-
-                    self.open.append(neighbour)
-                    h = dist(neighbour.coords(), self.end.coords())
-                    neighbour.f = tentative_g_score + h
-                    neighbour.g = tentative_g_score
-
-                    # Assign parent
-                    neighbour.parent = current
-
-                elif tentative_g_score < neighbour.g:
-                    neighbour.g = tentative_g_score
-                    neighbour.f = tentative_g_score + dist(
-                        neighbour.coords(), self.end.coords()
-                    )
-
-            # Draw the board
-            self.draw_board()
-
-            pygame.display.update()
-
-        # If open no longer has nodes
+        self.search_time += time.perf_counter() - began
+        self.taken += taken
         return False
 
-    def djikstra(self) -> bool:
-        """Djikstra's algorithm."""
-        distances = {node: float("inf") for node in flatten(self.cells)}
-        distances[self.start] = 0
-
-        # Use a priority queue to keep track of the next node to vist
-        queue = [(0, self.start)]
+    def complete(self, result) -> None:
+        """Stores the result of the finished search, and its stats and trace."""
+        algorithm, start, end = self.query
+        self.steps = None
+        self.hooked.close()
 
-        while queue:
-            # Get the node with the smallest distance from the start node
-            current_distance, current_node = heapq.heappop(queue)
+        self.result = result
+        self.cache.put(algorithm, start, end, result)
+        self.record_stats(SearchStats(algorithm, start, end, result, self.search_time, self.render_time))
 
-            # Skip ndoes that have already been visited
-            if current_node in self.closed:
-                continue
+        if self.trace is not None:
+            self.trace.record_path(result.path)
+            self.trace.finish()
 
-            # Mark the current node as visited
-            self.closed.append(current_node)
+    def cancel(self) -> None:
+        """Abandons the running search and clears what it explored from the board."""
+        if self.steps is None:
+            return
 
-            # Check if reached end
-            if current_node == self.end:
-                return True
+        self.steps.close()
+        self.steps = None
+        self.hooked.close()
+        self.trace = None
 
-            for neighbour in self.get_neigbours(current_node):
-                if neighbour not in self.open:
-                    self.open.append(neighbour)
-                distance = dist(self.end.coords(), neighbour.coords())
-                new_distance = current_distance + distance
-                if new_distance < distances[neighbour]:
-                    neighbour.parent = current_node
-                    distances[neighbour] = new_distance
-                    heapq.heappush(queue, (new_distance, neighbour))
+        self.renderer.mark_all(np.flatnonzero(self.board.state & SEARCH))
+        self.board.clear_search()
 
-            self.draw_board()
-            pygame.display.update()
-
-        # Search unsuccessful
-        return False
-
-    def bfs(self) -> bool:
+    def reset(self, keep_obstacles: bool = True) -> None:
         """
-        Breadth first search algorithm, using the open and closed list
-        as the queue and visited list
+        Gets the grid ready for a new query without rebuilding it. Any search
+        is abandoned, what the last one drew is cleared and the start and end
+        are removed, and unless keep_obstacles, the barriers and terrain are
+        cleared in bulk. The board, the solver and the path cache are kept,
+        along with everything they built for earlier searches.
         """
-        visited = self.closed
-        queue = self.open
-
-        # Add the starting node to the visited and queue
-        queue.append(self.start)
-        visited.append(self.start)
+        self.cancel()
 
-        while queue:
+        board = self.board
+        self.renderer.mark_all(np.flatnonzero(board.state))
+        board.clear_search()
+        board.state[:] = 0
 
-            # Pop the first element in the queue
-            current = queue.pop(0)
+        if not keep_obstacles:
+            if board.obstruction.any():
+                self.generate_maze(np.zeros(board.size, dtype=np.uint8))
+            if board.weighted:
+                self.generate_terrain(np.ones(board.size, dtype=np.uint8))
 
-            # Get the nodes neighbours
-            neighbours = self.get_neigbours(current)
-
-            for neighbour in neighbours:
-
-                if not neighbour.parent:
-                    neighbour.parent = current
-
-                # Check that neighbour is not in visited:
-                if neighbour not in visited:
-
-                    # Mark the node as visited
-                    visited.append(neighbour)
-
-                    # Check if it's the goal node
-                    if neighbour == self.end:
-                        return True
-                    else:
-                        queue.append(neighbour)
+        self.start = None
+        self.end = None
+        self.result = None
+        self.trace = None
+        self.stats = None
+        self.query = None
+        self.taken = 0
+
+    def search(self, algorithm: str) -> bool:
+        """Runs the named algorithm to the end and returns whether it found a path."""
+        self.begin(algorithm)
+        self.advance()
+        return self.result.found
+
+    def record_stats(self, stats: SearchStats) -> None:
+        """Keeps the stats of the latest search, writing them to the log if there is one."""
+        self.stats = stats
+        if self.log is not None:
+            self.log.write(stats)
 
-            self.draw_board()
+    def asearch(self) -> bool:
+        """A* search algorithm."""
+        return self.search("asearch")
 
-            pygame.display.update()
+    def djikstra(self) -> bool:
+        """Djikstra's algorithm."""
+        return self.search("djikstra")
 
-        return False
+    def bfs(self) -> bool:
+        """Breadth first search algorithm."""
+        return self.search("bfs")
 
     def dfs(self) -> bool:
-        """
-        Depth-First Search where the set of visited is self.closed
-        and the stack is self.open
-        """
-        # Initialise visited and stack
-        visited = self.closed
-        stack = self.open
-
-        # Append the start node to the stack
-        stack.append(self.start)
-
-        # Initiate loop
-        while stack:
-
-            # Pop the element from the stack and append it to the visited
-            current = stack.pop()
-
-            # Mark the node as visited
-            if current not in visited:
-                visited.append(current)
-
-            for neighbour in self.get_neigbours(current):
-
-                if not neighbour.parent:
-                    neighbour.parent = current
-
-                if neighbour not in visited:
-                    if neighbour == self.end:
-                        return True
-                    else:
-                        stack.append(neighbour)
-
-            # Draw the board
-            self.draw_board()
-
-            pygame.display.update()
-
-        # Search unsucessful
-        return False
+        """Depth first search algorithm."""
+        return self.search("dfs")
 
     def greedy(self) -> bool:
-        """
-        Greedy pathfinding algorithm that uses self.open and self.closed
-        as the two main lists
-        """
-
-        # Calculate the heuristic for the starting node
-        self.g_heuristic(self.start)
-
-        # Append the node to the open list
-        self.open.append(self.start)
-
-        while self.open:
-
-            # Find the node with the minimum heuristic value
-            current = self.open[0]
-            current_idx = 0
-
-            for index, node in enumerate(self.open):
-                if node.g < current.g:
-                    current = node
-                    current_idx = index
-
-            current = self.open.pop(current_idx)
-
-            # Check whether current node is the end
-            if current == self.end:
-                return True
-
-            # Append current node to the closed list
-            self.closed.append(current)
-
-            for neighbour in self.get_neigbours(current):
-                self.g_heuristic(neighbour)
-
-                if neighbour not in self.closed and neighbour not in self.open:
-                    neighbour.parent = current
-                    self.open.append(neighbour)
-
-                elif neighbour in self.open:
-                    continue
-
-            # Draw the board
-            self.draw_board()
-
-            pygame.display.update()
-
-        # Search unsuccessful
-        return False
+        """Greedy best first search algorithm."""
+        return self.search("greedy")
 
     def find_path(self) -> None:
         """Marks nodes as belonging to the path."""
-
-        current = self.end
-
-        while current != self.start:
-            current.path = True
-            current = current.parent
+        for i, j in self.result.path[1:]:
+            self.cells[i][j].path = True
@@ -0,0 +1,206 @@
+"""
+Races every algorithm on the same map, each in its own process. The map and
+its terrain are placed in shared memory once, as in batch.py, and every worker
+builds its Board from them before solving the one query with the algorithm
+it is handed. Laps are yielded as they finish and can be printed as a table,
+or drawn as small boards side by side.
+
+Usage: python race.py --map FILE --start 0,0 --end 99,99 --processes 4
+"""
+import argparse
+import os
+import time
+import numpy as np
+import pygame
+
+import maps
+from multiprocessing import get_context, shared_memory
+from batch import open_shared
+from board import Board, PATH
+from settings import methods
+from solver import Solver
+from viewport import CODES, PALETTE
+from renderer import TERRAIN
+
+
+# State of each worker process, set up by attach
+worker = {}
+
+
+class Lap:
+    """One algorithm's run in a race, with the board state it left behind."""
+
+    def __init__(self, algorithm: str, result, seconds: float, state: np.ndarray):
+
+        self.algorithm = algorithm
+        self.result = result
+        self.seconds = seconds
+        self.state = state
+
+    @property
+    def name(self) -> str:
+        """Display name of the algorithm."""
+        return next((name for name, method in methods.items() if method == self.algorithm), self.algorithm)
+
+    def __repr__(self) -> str:
+        return f"Lap({self.algorithm}, found={self.result.found}, {self.seconds * 1000:.1f}ms)"
+
+
+def attach(name: str, shape: tuple) -> None:
+    """
+    Pool initializer, building the worker's Board from the shared cells, which
+    hold each cell's terrain cost, or 0 for a wall.
+    """
+    block = open_shared(name)
+    cells = np.ndarray(shape, dtype=np.uint8, buffer=block.buf)
+
+    board = Board.from_mask(cells == 0)
+    board.set_costs(np.maximum(cells, 1))
+
+    worker["block"] = block
+    worker["solver"] = Solver(board)
+
+
+def work(task: tuple) -> Lap:
+    """
+    Runs one algorithm inside a worker. Time is measured on the process's own
+    clock, so algorithms sharing a CPU with each other are still timed fairly.
+    """
+    algorithm, start, end = task
+    solver = worker["solver"]
+
+    began = time.process_time()
+    result = getattr(solver, algorithm)(start, end)
+    seconds = time.process_time() - began
+
+    # Mark the path, which the solvers leave for the Grid to draw
+    state = solver.board.state.copy()
+    for i, j in result.path:
+        state[solver.board.index(i, j)] |= PATH
+
+    return Lap(algorithm, result, seconds, state)
+
+
+def race(mask, costs, start: tuple, end: tuple, algorithms: list = None, processes: int = None):
+    """
+    Solves the query from start to end with every algorithm, all of them at
+    once across a pool of processes, yielding a Lap for each as it finishes.
+    """
+    mask = np.asarray(mask) != 0
+    if algorithms is None:
+        algorithms = list(dict.fromkeys(methods.values()))
+
+    cells = np.ones(mask.shape, dtype=np.uint8) if costs is None else np.clip(np.asarray(costs), 1, 255)
+    cells = np.where(mask, 0, cells.reshape(mask.shape)).astype(np.uint8)
+
+    block = shared_memory.SharedMemory(create=True, size=max(cells.nbytes, 1))
+    try:
+        np.ndarray(cells.shape, dtype=np.uint8, buffer=block.buf)[:] = cells
+        tasks = [(algorithm, tuple(start), tuple(end)) for algorithm in algorithms]
+
+        # Workers are spawned rather than forked, as a fork of the visualiser
+        # would inherit SDL's signal handlers and ignore the pool shutting down
+        processes = min(processes or os.cpu_count(), len(tasks))
+        context = get_context("spawn")
+        with context.Pool(processes, initializer=attach, initargs=(block.name, cells.shape)) as pool:
+            yield from pool.imap_unordered(work, tasks)
+
+    finally:
+        block.close()
+        block.unlink()
+
+
+# Columns of the results table, with their widths when printed
+COLUMNS = [("Algorithm", 34), ("Time", 10), ("Expanded", 10), ("Length", 8), ("Cost", 10)]
+
+
+def rows(laps: list) -> list:
+    """The cells of a table of the laps as text, fastest first."""
+    table = []
+    for lap in sorted(laps, key=lambda lap: lap.seconds):
+        result = lap.result
+        table.append(
+            (
+                lap.name,
+                f"{lap.seconds * 1000:.1f}ms",
+                str(result.expanded),
+                str(len(result.path)) if result.found else "none",
+                f"{result.cost:.2f}" if result.found else "none",
+            )
+        )
+    return table
+
+
+def table(laps: list) -> list:
+    """Lines of a table of the laps, ready to print."""
+    lines = []
+    for cells in [tuple(heading for heading, _ in COLUMNS)] + rows(laps):
+        name, *numbers = cells
+        lines.append(name.ljust(COLUMNS[0][1]) + "".join(
+            number.rjust(width) for number, (_, width) in zip(numbers, COLUMNS[1:])
+        ))
+    return lines
+
+
+def picture(lap: Lap, mask, costs, size: tuple) -> pygame.Surface:
+    """Draws the board a lap left behind, scaled to size, in the viewport's colours."""
+    mask = np.asarray(mask) != 0
+    codes = CODES[lap.state.reshape(mask.shape) | (mask.astype(np.uint8) << 7)]
+    terrain = np.ones(mask.shape, dtype=np.uint8) if costs is None else np.asarray(costs).reshape(mask.shape)
+
+    # surfarray expects the x axis first
+    colours = np.where((codes == 0)[..., None], TERRAIN[terrain], PALETTE[codes])
+    return pygame.transform.scale(pygame.surfarray.make_surface(colours.transpose(1, 0, 2)), size)
+
+
+def parse_cell(text: str) -> tuple:
+    """Parses a ROW,COLUMN command line argument."""
+    row, column = text.split(",")
+    return int(row), int(column)
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Race every algorithm on one map")
+    parser.add_argument("--map", metavar="FILE", help="load the barriers from a .map, .txt, .png or .npy file")
+    parser.add_argument("--terrain", metavar="FILE", help="load terrain costs from a .npy or .txt file")
+    parser.add_argument("--size", default="200x200", help="HEIGHTxWIDTH of the random map")
+    parser.add_argument("--density", type=float, default=0.25)
+    parser.add_argument("--weights", type=int, help="give every cell a random cost from 1 to this")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--start", type=parse_cell, help="ROW,COLUMN of the start, the first free cell by default")
+    parser.add_argument("--end", type=parse_cell, help="ROW,COLUMN of the end, the last free cell by default")
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    if args.map:
+        mask = maps.load(args.map) != 0
+    else:
+        height, width = (int(part) for part in args.size.lower().split("x"))
+        mask = rng.random((height, width)) < args.density
+
+    costs = None
+    if args.terrain:
+        costs = maps.load_costs(args.terrain)
+    elif args.weights:
+        costs = rng.integers(1, args.weights + 1, size=mask.shape)
+
+    free = np.argwhere(~mask)
+    start = args.start or tuple(int(x) for x in free[0])
+    end = args.end or tuple(int(x) for x in free[-1])
+    for cell in (start, end):
+        if mask[cell]:
+            parser.error(f"{cell} is a wall")
+
+    began = time.perf_counter()
+    laps = list(race(mask, costs, start, end, processes=args.processes))
+    elapsed = time.perf_counter() - began
+
+    print(f"{mask.shape[0]}x{mask.shape[1]} map, {start} to {end}")
+    print("\n".join(table(laps)))
+    print(f"{len(laps)} algorithms on {args.processes} processes in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Compact recordings of searches. Every event the solver reports is packed into
+a single integer, (cell index << 3) | event, so a trace costs 8 bytes per event
+and saves to a compressed .npz file together with the map it was recorded on.
+The board state after any step can be rebuilt from a trace with a few vectorised
+operations, which is what lets the runner replay, scrub and jump through it
+without running the algorithm again.
+"""
+import numpy as np
+
+from board import START, END, OPENED, CLOSED, PATH, OPENED_BACK, CLOSED_BACK
+from solver import OPEN, CLOSE, STEP, OPEN_BACK, CLOSE_BACK
+
+
+# Event recorded for each cell of the final path
+PATH_EVENT = 5
+
+# State flag set by each event
+FLAGS = np.zeros(8, dtype=np.uint8)
+FLAGS[OPEN] = OPENED
+FLAGS[CLOSE] = CLOSED
+FLAGS[OPEN_BACK] = OPENED_BACK
+FLAGS[CLOSE_BACK] = CLOSED_BACK
+FLAGS[PATH_EVENT] = PATH
+
+
+class Trace:
+    """The events of one search on one map."""
+
+    def __init__(self, mask, start: tuple, end: tuple, algorithm: str, events=None):
+
+        self.mask = np.asarray(mask) != 0
+        self.start = tuple(start)
+        self.end = tuple(end)
+        self.algorithm = algorithm
+
+        # Packed events, appended to a list while recording
+        self.events = [] if events is None else events
+        self.steps = None
+        if events is not None:
+            self.finish()
+
+    def record(self, event: int, index: int) -> None:
+        """Observer callback, recording one event from the solver."""
+        self.events.append(int(index) << 3 | event)
+
+    def record_path(self, path: list) -> None:
+        """Records the cells of the final path, as (row, column) pairs."""
+        width = self.mask.shape[1]
+        for i, j in path:
+            self.record(PATH_EVENT, i * width + j)
+        if path:
+            self.record(STEP, i * width + j)
+
+    def finish(self) -> None:
+        """Packs the recorded events into an array and indexes the steps."""
+        self.events = np.asarray(self.events, dtype=np.int64)
+
+        # Number of events up to the end of each step
+        self.steps = np.flatnonzero(self.events & 7 == STEP) + 1
+
+    def __len__(self) -> int:
+        """Number of steps."""
+        return len(self.steps)
+
+    def position(self, step: int) -> int:
+        """Number of events up to and including the given step, counting from 1."""
+        if step <= 0:
+            return 0
+        return int(self.steps[min(step, len(self.steps)) - 1])
+
+    def apply(self, state: np.ndarray, begin: int, end: int) -> None:
+        """Sets the flags of the events in [begin, end) on a state array."""
+        events = self.events[begin:end]
+        np.bitwise_or.at(state, events >> 3, FLAGS[events & 7])
+
+    def state_at(self, step: int) -> np.ndarray:
+        """Rebuilds the state array of the board as it was after the given step."""
+        state = np.zeros(self.mask.size, dtype=np.uint8)
+        state[self.start[0] * self.mask.shape[1] + self.start[1]] |= START
+        state[self.end[0] * self.mask.shape[1] + self.end[1]] |= END
+        self.apply(state, 0, self.position(step))
+        return state
+
+    def save(self, path: str) -> None:
+        """Writes the trace and its map to a compressed .npz file."""
+        np.savez_compressed(
+            path,
+            events=self.events,
+            mask=np.packbits(self.mask),
+            shape=self.mask.shape,
+            start=self.start,
+            end=self.end,
+            algorithm=self.algorithm,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "Trace":
+        """Reads a trace written by save."""
+        with np.load(path) as data:
+            shape = tuple(data["shape"])
+            mask = np.unpackbits(data["mask"], count=shape[0] * shape[1]).reshape(shape)
+            start = tuple(int(x) for x in data["start"])
+            end = tuple(int(x) for x in data["end"])
+            return cls(mask, start, end, str(data["algorithm"]), data["events"])
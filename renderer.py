@@ -0,0 +1,120 @@
+import pygame
+import numpy as np
+
+from settings import *
+from board import START, END, OPENED, CLOSED, PATH, OPENED_BACK, CLOSED_BACK
+
+
+def terrain_palette() -> np.ndarray:
+    """Colour of a free cell for every terrain cost, shading from black towards MUD."""
+    shade = np.minimum(np.arange(256) - 1, MAX_TERRAIN - 1).clip(0) / (MAX_TERRAIN - 1)
+    return (shade[:, None] * np.array(MUD)).astype(np.uint8)
+
+
+TERRAIN = terrain_palette()
+
+
+class BoardRenderer:
+    """
+    Keeps an off-screen image of the board and only repaints the cells that
+    were marked as changed since the last frame.
+    """
+
+    def __init__(self, board, board_origin, cell_size, pin, flag):
+
+        self.board = board
+        self.board_origin = board_origin
+        self.cell_size = cell_size
+        self.pin = pin
+        self.flag = flag
+
+        size = (board.width * cell_size, board.height * cell_size)
+
+        # Pre-render the empty board with its cell outlines
+        self.lines = pygame.Surface(size)
+        self.lines.fill(BLACK)
+        for j in range(board.width):
+            for x in (j * cell_size, (j + 1) * cell_size - 1):
+                pygame.draw.line(self.lines, WHITE, (x, 0), (x, size[1] - 1))
+        for i in range(board.height):
+            for y in (i * cell_size, (i + 1) * cell_size - 1):
+                pygame.draw.line(self.lines, WHITE, (0, y), (size[0] - 1, y))
+
+        # The board as currently drawn
+        self.surface = self.lines.copy()
+
+        # Cells waiting to be repainted, starting with everything
+        self.dirty = set(range(board.size))
+
+    def mark(self, index: int) -> None:
+        """Schedules a cell to be repainted."""
+        self.dirty.add(int(index))
+
+    def mark_all(self, indices) -> None:
+        """Schedules several cells to be repainted."""
+        self.dirty.update(int(index) for index in indices)
+
+    def cell_at(self, pos: tuple):
+        """Returns the index of the cell under a screen position, or None."""
+        x, y = pos[0] - self.board_origin[0], pos[1] - self.board_origin[1]
+        if x < 0 or y < 0:
+            return None
+
+        i, j = y // self.cell_size, x // self.cell_size
+        if i < self.board.height and j < self.board.width:
+            return self.board.index(i, j)
+        return None
+
+    def local_rect(self, index: int) -> pygame.Rect:
+        """Rect of the cell on the off-screen surface."""
+        i, j = self.board.coords(index)
+        return pygame.Rect(j * self.cell_size, i * self.cell_size, self.cell_size, self.cell_size)
+
+    def paint(self, index: int) -> pygame.Rect:
+        """Redraws a single cell on the off-screen surface and returns its rect."""
+        rect = self.local_rect(index)
+        state = self.board.state[index]
+
+        # Restore the outline before drawing the contents
+        self.surface.blit(self.lines, rect, rect)
+
+        if self.board.obstruction[index]:
+            pygame.draw.rect(self.surface, WHITE, rect)
+        elif state & START:
+            self.surface.blit(self.pin, rect)
+        elif state & END:
+            self.surface.blit(self.flag, rect)
+        elif state & PATH:
+            pygame.draw.rect(self.surface, BLUE, rect)
+        elif state & CLOSED:
+            pygame.draw.rect(self.surface, RED, rect)
+        elif state & CLOSED_BACK:
+            pygame.draw.rect(self.surface, PURPLE, rect)
+        elif state & OPENED:
+            pygame.draw.rect(self.surface, GREEN, rect)
+        elif state & OPENED_BACK:
+            pygame.draw.rect(self.surface, YELLOW, rect)
+        elif self.board.cost[index] > 1:
+            pygame.draw.rect(self.surface, TERRAIN[self.board.cost[index]], rect.inflate(-2, -2))
+
+        return rect
+
+    def refresh(self) -> list:
+        """Repaints the changed cells and returns their rects on the off-screen surface."""
+        rects = [self.paint(index) for index in self.dirty]
+        self.dirty.clear()
+        return rects
+
+    def draw(self, screen: pygame.Surface) -> None:
+        """Brings the board up to date and blits all of it onto the screen."""
+        self.refresh()
+        screen.blit(self.surface, self.board_origin)
+
+    def update(self, screen: pygame.Surface) -> None:
+        """Copies only the changed cells onto the screen and pushes them to the display."""
+        rects = []
+
+        for rect in self.refresh():
+            rects.append(screen.blit(self.surface, rect.move(self.board_origin), rect))
+
+        pygame.display.update(rects)
@@ -1,26 +1,257 @@
+import argparse
 import sys
-import time
 import pygame
 import numpy as np
 
+import maps
+import race
 from settings import *
+from mazes import GENERATORS, generate
 from pathfinder import Grid
+from recording import Trace
+from stats import StatsLog, profiler
+from utils import line, parse_size, parse_speed
+from viewport import Viewport
+
+
+# Camera movement per frame for the arrow keys, in pixels, and zoom per wheel notch
+PAN_SPEED = 12
+ZOOM_STEP = 1.25
+
+# Replay speeds, in steps per second
+REPLAY_SPEED = 60
+MAX_REPLAY_SPEED = 100000
+
+# Search speeds, in steps per second. Speeding up past the maximum makes the
+# search instant, running as many steps as fit in each frame
+SEARCH_SPEED = 500
+MAX_SEARCH_SPEED = 100000
+
+# Share of each frame a search may spend stepping, so the window stays responsive
+FRAME_BUDGET = 0.75 / FPS
+
+
+def edit_barrier(grid, stroke, mouse, obstruction: bool, cost: int = None) -> tuple:
+    """
+    Sets or clears the barriers on the line from the last cell of the stroke,
+    if there is one, to the cell under the mouse, so that fast drags leave no
+    gaps, and paints the terrain cost along it if one is given. Returns the
+    new end of the stroke and whether any cell changed.
+    """
+    node = grid.node_at(mouse)
+    if node is None:
+        return None, False
+
+    changed = False
+    for i, j in [node.coords()] if stroke is None else line(stroke, node.coords()):
+        cell = grid.cells[i][j]
+        if cell.start or cell.end:
+            continue
+
+        if cell.obstruction != obstruction:
+            cell.obstruction = obstruction
+            changed = True
+        if cost is not None and cell.cost != cost:
+            cell.cost = cost
+            changed = True
+
+    return node.coords(), changed
+
+
+def label(font, text: str, center: tuple, colour: tuple = WHITE) -> tuple:
+    """Renders a line of text once, returning the surface and where to blit it."""
+    surface = font.render(text, True, colour)
+    return surface, surface.get_rect(center=center)
+
+
+def button(font, text: str, rect: pygame.Rect) -> tuple:
+    """Renders a white button with its label once, returning the surface and its rect."""
+    surface = pygame.Surface(rect.size)
+    surface.fill(WHITE)
+    text, text_rect = label(font, text, (rect.width / 2, rect.height / 2), BLACK)
+    surface.blit(text, text_rect)
+    return surface, rect
+
+
+def seek(grid, trace: Trace, current: int, step: int) -> int:
+    """Brings the board from one step of a trace to another, returning the new step."""
+    step = min(max(step, 0), len(trace))
+    board = grid.board
+
+    if step >= current:
+        # Moving forwards only needs the events in between
+        begin, end = trace.position(current), trace.position(step)
+        trace.apply(board.state, begin, end)
+        grid.renderer.mark_all(np.unique(trace.events[begin:end] >> 3))
+    else:
+        state = trace.state_at(step)
+        grid.renderer.mark_all(np.flatnonzero(state != board.state))
+        board.state[:] = state
 
+    return step
 
-def main():
 
-    # Initialise algorithm variables
-    algorithm = None
+def replay(grid, trace: Trace, screen, font) -> None:
+    """
+    Plays back a recorded search. Space plays and pauses, the left and right
+    arrows step, up and down change the speed, Home and End jump to either end
+    and clicking the progress bar jumps to that point.
+    """
+    clock = pygame.time.Clock()
+    bar = pygame.Rect(BOARD_PADDING, 80, width - 2 * BOARD_PADDING, 12)
+    algorithm = next((name for name, method in methods.items() if method == trace.algorithm), trace.algorithm)
 
-    # Check usage
-    if len(sys.argv) in [2, 3]:
+    step = seek(grid, trace, 0, 0)
+    playing = True
+    speed = REPLAY_SPEED
+    progress = 0.0
 
-        # Parse the command line arguments:
-        algorithm = sys.argv[1]
-        if algorithm.lower() not in algorithms:
-            sys.exit("This algorithm has not been implemented yet")
+    while True:
 
-    else:
+        elapsed = clock.tick(FPS) / 1000
+        events = pygame.event.get()
+
+        for event in events:
+            if event.type == pygame.QUIT:
+                sys.exit()
+
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    playing = not playing
+                    if step == len(trace):
+                        step = seek(grid, trace, step, 0)
+                elif event.key == pygame.K_RIGHT:
+                    playing = False
+                    step = seek(grid, trace, step, step + 1)
+                elif event.key == pygame.K_LEFT:
+                    playing = False
+                    step = seek(grid, trace, step, step - 1)
+                elif event.key == pygame.K_UP:
+                    speed = min(speed * 2, MAX_REPLAY_SPEED)
+                elif event.key == pygame.K_DOWN:
+                    speed = max(speed // 2, 1)
+                elif event.key == pygame.K_HOME:
+                    step = seek(grid, trace, step, 0)
+                elif event.key == pygame.K_END:
+                    step = seek(grid, trace, step, len(trace))
+
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and bar.collidepoint(event.pos):
+                step = seek(grid, trace, step, round((event.pos[0] - bar.x) / bar.width * len(trace)))
+
+            # The viewport still zooms and pans during a replay
+            elif isinstance(grid.renderer, Viewport) and event.type == pygame.MOUSEWHEEL:
+                grid.renderer.zoom_at(ZOOM_STEP ** event.y, pygame.mouse.get_pos())
+            elif isinstance(grid.renderer, Viewport) and event.type == pygame.MOUSEMOTION and event.buttons[1]:
+                grid.renderer.pan(-event.rel[0], -event.rel[1])
+
+        # Advance by however many steps the speed allows in this frame
+        if playing:
+            progress += speed * elapsed
+            if int(progress):
+                step = seek(grid, trace, step, step + int(progress))
+                progress -= int(progress)
+            if step == len(trace):
+                playing = False
+
+        # Paused with no input, the screen is already up to date
+        elif not events:
+            continue
+
+        screen.fill(BLACK)
+
+        status = f"{algorithm}: step {step} / {len(trace)}, {speed}/s{'' if playing else ', paused'}"
+        line = font.render(status, True, WHITE)
+        line_rect = line.get_rect()
+        line_rect.center = ((width / 2), 50)
+        screen.blit(line, line_rect)
+
+        pygame.draw.rect(screen, WHITE, bar, 1)
+        if len(trace):
+            pygame.draw.rect(screen, WHITE, (bar.x, bar.y, bar.width * step // len(trace), bar.height))
+
+        grid.draw_board()
+        pygame.display.flip()
+
+
+def draw_race(screen, font, laps: list, mask, costs, boards: bool) -> None:
+    """
+    Shows the outcome of a race over the board's area, either as a table of
+    every algorithm's time, expansions and path, or as small boards side by side.
+    """
+    area = pygame.Rect(BOARD_PADDING, board_origin[1], board_width, height - board_origin[1] - BOARD_PADDING)
+
+    if not boards:
+        # Names on the left, then columns of numbers as wide as their widest
+        # entry, right aligned against the right of the area
+        table = [tuple(heading for heading, _ in race.COLUMNS)] + race.rows(laps)
+        widths = [max(font.size(cells[column])[0] for cells in table) for column in range(len(table[0]))]
+        edges = [area.right]
+        for column_width in reversed(widths[1:]):
+            edges.insert(0, edges[0] - column_width - 12)
+        line_height = min(area.height // len(table), 24)
+
+        for number, cells in enumerate(table):
+            y = area.y + number * line_height
+            colour = YELLOW if number == 0 else WHITE
+            screen.blit(font.render(cells[0], True, colour), (area.x, y))
+            for text, edge in zip(cells[1:], edges[1:]):
+                surface = font.render(text, True, colour)
+                screen.blit(surface, surface.get_rect(topright=(edge, y)))
+        return
+
+    # A grid of tiles, each a board with its algorithm and time underneath
+    columns = max(1, round((len(laps) * area.width / area.height) ** 0.5))
+    tile_rows = -(-len(laps) // columns)
+    tile = (area.width // columns, area.height // tile_rows)
+    caption = font.get_linesize()
+    shape = np.asarray(mask).shape
+
+    scale = min((tile[0] - 4) / shape[1], (tile[1] - caption - 4) / shape[0])
+    size = (max(int(shape[1] * scale), 1), max(int(shape[0] * scale), 1))
+
+    for number, lap in enumerate(sorted(laps, key=lambda lap: lap.seconds)):
+        row, column = divmod(number, columns)
+        x, y = area.x + column * tile[0], area.y + row * tile[1]
+        screen.blit(race.picture(lap, mask, costs, size), (x + (tile[0] - size[0]) // 2, y))
+
+        text = f"{lap.name}  {lap.seconds * 1000:.1f}ms"
+        surface = font.render(text, True, WHITE)
+        if surface.get_width() > tile[0]:
+            surface = font.render(f"{lap.seconds * 1000:.1f}ms", True, WHITE)
+        screen.blit(surface, surface.get_rect(midtop=(x + tile[0] // 2, y + size[1] + 2)))
+
+
+def main():
+
+    # Parse the command line arguments
+    parser = argparse.ArgumentParser(description="Pathfinding visualiser")
+    parser.add_argument("algorithm", nargs="?", help="algorithm keyword, A* search by default")
+    parser.add_argument("maze", nargs="?", choices=["maze", *GENERATORS],
+                        help="fill the board with a maze from this generator, maze meaning backtracker")
+    parser.add_argument("--seed", type=int, help="seed for the maze, random by default")
+    parser.add_argument("--density", type=float, help="wall density for the random and caves mazes")
+    parser.add_argument("--size", type=parse_size, default=(HEIGHT, WIDTH), help="HEIGHTxWIDTH of the board")
+    parser.add_argument("--viewport", action="store_true",
+                        help="draw the board through a pannable, zoomable viewport")
+    parser.add_argument("--record", metavar="FILE", help="save a trace of each search to FILE (.npz)")
+    parser.add_argument("--replay", metavar="FILE", help="play back a trace saved with --record")
+    parser.add_argument("--map", metavar="FILE",
+                        help="load the barriers from a .map, .txt, .png or .npy file, sizing the board to it")
+    parser.add_argument("--save", metavar="FILE", help="save the barriers to FILE when a search starts")
+    parser.add_argument("--terrain", metavar="FILE",
+                        help="load terrain costs from a .npy or .txt file, sizing the board to it")
+    parser.add_argument("--speed", type=parse_speed, default=SEARCH_SPEED,
+                        help="search steps per second, or instant")
+    parser.add_argument("--stats", metavar="FILE", help="append the counters and timings of each search to FILE (.jsonl)")
+    parser.add_argument("--profile", metavar="FILE", nargs="?", const="",
+                        help="run each search under cProfile, dumping to FILE or printing a summary")
+    parser.add_argument("--race", action="store_true",
+                        help="run every algorithm on the board at once and compare them")
+    parser.add_argument("--processes", type=int, help="worker processes for --race, one per CPU by default")
+    args = parser.parse_args()
+
+    algorithm = args.algorithm
+    if algorithm is None:
 
         # Use a* as default algorithm but print usage
         algorithm = "asearch"
@@ -28,6 +259,32 @@ def main():
         print("Suggested Usage: python runner.py algorithm maze")
         print("------------------------------------------------")
 
+    elif algorithm.lower() not in algorithms:
+        sys.exit("This algorithm has not been implemented yet")
+
+    # A replay takes its board from the trace
+    trace = None
+    if args.replay:
+        trace = Trace.load(args.replay)
+        args.size = trace.mask.shape
+
+    # So do map and terrain files, which are read before the window is sized
+    loaded = None
+    if args.map:
+        loaded = maps.load(args.map)
+        args.size = loaded.shape
+
+    terrain = None
+    if args.terrain:
+        terrain = maps.load_costs(args.terrain)
+        args.size = terrain.shape
+
+    # Fit the board into the window, switching to a viewport if its cells
+    # would be too small to see or click
+    rows, columns = args.size
+    cell = int(min(viewport_size[0] / columns, viewport_size[1] / rows))
+    viewport = viewport_size if args.viewport or cell < MIN_CELL_SIZE else None
+
     # Create game
     pygame.init()
     pygame.display.set_caption("Pathfinder")
@@ -39,26 +296,76 @@ def main():
     WALKWAY = "assets/fonts/Walkway_UltraBold.ttf"
     small_font = pygame.font.Font(WALKWAY, 20)
     medium_font = pygame.font.Font(WALKWAY, 28)
+    table_font = pygame.font.Font(WALKWAY, 17)
+    tiny_font = pygame.font.Font(WALKWAY, 14)
     large_font = pygame.font.Font(WALKWAY, 40)
 
-    # Add the flag (end) and pin (start) image
+    # Add the flag (end) and pin (start) image, which the viewport scales itself
     pin = pygame.image.load("assets/images/pin.jpeg")
-    pin = pygame.transform.scale(pin, (cell_size - 2, cell_size - 2))
     flag = pygame.image.load("assets/images/flag.png")
-    flag = pygame.transform.scale(flag, (cell_size - 2, cell_size - 2))
+    if viewport is None:
+        pin = pygame.transform.scale(pin, (cell - 2, cell - 2))
+        flag = pygame.transform.scale(flag, (cell - 2, cell - 2))
 
     # Initialise the grid
-    grid = Grid(HEIGHT, WIDTH, board_origin, cell_size, pin, flag)
-    cells = grid.cells
+    grid = Grid(rows, columns, board_origin, cell, pin, flag, viewport)
     mask = None
 
-    # Generate maze if asked
-    try:
-        if sys.argv[2]:
-            mask = np.random.randint(0, 2, (HEIGHT, WIDTH))
-            grid.generate_maze(mask)
-    except IndexError:
-        pass
+    if loaded is not None:
+        mask = loaded
+        grid.generate_maze(mask)
+    if terrain is not None:
+        grid.generate_terrain(terrain)
+
+    # Generate maze if asked, printing the seed so that it can be reproduced
+    if args.maze:
+        seed = args.seed if args.seed is not None else int(np.random.randint(2 ** 31))
+        options = {} if args.density is None else {"density": args.density}
+        print(f"Maze: {args.maze}, seed {seed}")
+        mask = generate("backtracker" if args.maze == "maze" else args.maze, rows, columns, seed, **options)
+        grid.generate_maze(mask)
+
+    # Show the recorded search instead of running one
+    if trace is not None:
+        grid.generate_maze(trace.mask)
+        replay(grid, trace, screen, small_font)
+
+    # Instrumentation, kept by the grid across resets
+    grid.recording = args.record is not None
+    grid.log = StatsLog(args.stats) if args.stats else None
+    grid.hooks = [] if args.profile is None else [profiler(args.profile or None)]
+
+    # Pre-render every piece of text and every button once
+    title = label(large_font, "Pathfinding Visualiser", ((width / 2), 100))
+    description = [
+        label(small_font, sentence, ((width / 2), 215 + 30 * i))
+        for i, sentence in enumerate(
+            [
+                "You get to choose the start and end point of the pathfinder",
+                "Racing every pathfinding algorithm," if args.race
+                else f"Using the {algorithms[algorithm.lower()]} pathfinding algorithm,",
+                "the shortest path will be calculated",
+            ]
+        )
+    ]
+    start_button = button(medium_font, "Start", pygame.Rect((width / 4), (3 / 4) * height, width / 2, 50))
+    search_button = button(medium_font, "Search", pygame.Rect((width * (1 / 2)) + BOARD_PADDING, 30, 100, 40))
+    reset_button = button(medium_font, "Reset", pygame.Rect((width * (1 / 2)) + BOARD_PADDING + 115, 30, 100, 40))
+    result_reset_button = button(
+        medium_font, "Reset", pygame.Rect((width * (1 / 2)) + BOARD_PADDING + 30, 30, 100, 40)
+    )
+    place_start = label(medium_font, "Place start node", ((width / 2), 50))
+    place_end = label(medium_font, "Place end node", ((width / 2), 50))
+    draw_barriers = label(medium_font, "Draw barriers", ((width / 3), 50))
+    paint_terrain = {
+        cost: label(medium_font, f"Paint terrain {cost}", ((width / 3), 50)) for cost in range(1, 10)
+    }
+    brush_keys = label(small_font, "0 barriers   1 to 9 terrain   right click erases", ((width / 2), 95))
+    cancel_button = button(medium_font, "Cancel", pygame.Rect((width * (1 / 2)) + BOARD_PADDING + 115, 30, 100, 40))
+    search_keys = label(small_font, "Space pause   N step   F faster   S slower   Esc cancel", ((width / 2), 95))
+    race_keys = label(small_font, "Tab switches between the table and the boards", ((width / 2), 95))
+    path_found = label(medium_font, "Path Found!", ((width / 3), 50))
+    no_path = label(medium_font, "No path found...", ((width / 3), 50))
 
     # Set logical barriers
     instructions = True
@@ -69,300 +376,314 @@ def main():
     found = False
     path = False
 
-    # Create draw board function
-    def draw_board(cells, board_origin, cell_size, screen, grid) -> None:
-        """Draw the rects for the nodes."""
-
-        for row in cells:
-            for node in row:
-                node.draw(board_origin, cell_size, screen)
-
-                if node.obstruction:
-                    node.fill(screen, WHITE)
-                elif node.start:
-                    screen.blit(pin, node.rect)
-                elif node.end:
-                    screen.blit(flag, node.rect)
-                elif node.path:
-                    node.fill(screen, BLUE)
-                elif node in grid.closed:
-                    node.fill(screen, RED)
-                elif node in grid.open:
-                    node.fill(screen, GREEN)
+    # Painted onto the board in the barriers stage: 0 for barriers, otherwise
+    # the terrain cost
+    brush = 0
+
+    # Whether a search has been started and is being stepped through, and the
+    # fraction of a step carried over between frames
+    running = False
+    paused = False
+    speed = args.speed
+    progress = 0.0
+
+    # Laps of the last race, and whether they are shown as boards or a table
+    laps = []
+    race_boards = False
+
+    # Last cell of the barrier stroke being drawn, if any. A press starts a
+    # new stroke and dragging extends it
+    stroke = None
+
+    # Frames left to draw before the loop can idle. Input is acted on after the
+    # frame showing it is drawn, so every change is drawn twice
+    clock = pygame.time.Clock()
+    redraw = 2
 
     while True:
 
-        # Check if game is quit
-        for event in pygame.event.get():
+        elapsed = min(clock.tick(FPS) / 1000, 0.1)
+
+        # Gather this frame's input in order, as (button, position, dragging)
+        # for presses of the left and right buttons and moves with one held
+        inputs = []
+        events = pygame.event.get()
+
+        for event in events:
             if event.type == pygame.QUIT:
                 sys.exit()
 
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button in (1, 3):
+                inputs.append((event.button, event.pos, False))
+            elif event.type == pygame.MOUSEMOTION and (event.buttons[0] or event.buttons[2]):
+                inputs.append((1 if event.buttons[0] else 3, event.pos, True))
+
+            # Zoom with the wheel and pan by dragging with the middle button
+            elif viewport and event.type == pygame.MOUSEWHEEL:
+                grid.renderer.zoom_at(ZOOM_STEP ** event.y, pygame.mouse.get_pos())
+            elif viewport and event.type == pygame.MOUSEMOTION and event.buttons[1]:
+                grid.renderer.pan(-event.rel[0], -event.rel[1])
+
+        # Pan with the arrow keys
+        panning = False
+        if viewport:
+            keys = pygame.key.get_pressed()
+            dx = keys[pygame.K_RIGHT] - keys[pygame.K_LEFT]
+            dy = keys[pygame.K_DOWN] - keys[pygame.K_UP]
+            grid.renderer.pan(dx * PAN_SPEED, dy * PAN_SPEED)
+            panning = bool(dx or dy)
+
+        # Nothing has changed, so the screen is already up to date
+        if events or panning:
+            redraw = 2
+        if not redraw:
+            continue
+        redraw -= 1
+
         screen.fill(BLACK)
 
         # Show visualiser instructions
         if instructions:
 
-            # Title
-            title = large_font.render("Pathfinding Visualiser", True, WHITE)
-            title_rect = title.get_rect()
-            title_rect.center = ((width / 2), 100)
-            screen.blit(title, title_rect)
-
-            # Description
-            description = [
-                "You get to choose the start and end point of the pathfinder",
-                f"Using the {algorithms[algorithm]} pathfinding algorithm,",
-                "the shortest path will be calculated",
-            ]
-            for i, sentence in enumerate(description):
-                line = small_font.render(sentence, True, WHITE)
-                line_rect = line.get_rect()
-                line_rect.center = ((width / 2), 215 + 30 * i)
-                screen.blit(line, line_rect)
-
-            # Start button
-            button_rect = pygame.Rect((width / 4), (3 / 4) * height, width / 2, 50)
-            button_text = medium_font.render("Start", True, BLACK)
-            button_text_rect = button_text.get_rect()
-            button_text_rect.center = button_rect.center
-            pygame.draw.rect(screen, WHITE, button_rect)
-            screen.blit(button_text, button_text_rect)
+            screen.blit(*title)
+            for sentence in description:
+                screen.blit(*sentence)
+            screen.blit(*start_button)
 
             # Check button input
-            click, _, _ = pygame.mouse.get_pressed()
-            if click == 1:
-                mouse = pygame.mouse.get_pos()
-                if button_rect.collidepoint(mouse):
+            for pressed, mouse, dragging in inputs:
+                if pressed == 1 and not dragging and start_button[1].collidepoint(mouse):
                     instructions = False
-                    time.sleep(0.3)
 
         # Show instructions to place start node
         elif start:
 
-            # Write instructions on screen
-            instruction = medium_font.render("Place start node", True, WHITE)
-            instruction_rect = instruction.get_rect()
-            instruction_rect.center = ((width / 2), 50)
-            screen.blit(instruction, instruction_rect)
+            screen.blit(*place_start)
 
             # Draw the board
             grid.draw_board()
 
             # Add start node
-            left, _, _ = pygame.mouse.get_pressed()
-
-            if left == 1:
-                mouse = pygame.mouse.get_pos()
-                for i in range(HEIGHT):
-                    for j in range(WIDTH):
-                        node = cells[i][j]
-                        if node.rect.collidepoint(mouse) and not node.obstruction:
-                            # Marks the node as start
-                            node.start = True
-                            grid.start = node
-                            start = False
-                            time.sleep(0.3)
+            for pressed, mouse, dragging in inputs:
+                node = grid.node_at(mouse)
+                if pressed == 1 and not dragging and node is not None and not node.obstruction:
+                    # Marks the node as start
+                    node.start = True
+                    grid.start = node
+                    start = False
+                    break
 
         # Show instructions to place end node
         elif end:
 
-            # Write instructions
-            instruction = medium_font.render("Place end node", True, WHITE)
-            instruction_rect = instruction.get_rect()
-            instruction_rect.center = ((width / 2), 50)
-            screen.blit(instruction, instruction_rect)
+            screen.blit(*place_end)
 
             # Draw the board
-            draw_board(cells, board_origin, cell_size, screen, grid)
+            grid.draw_board()
 
             # Add end node
-            left, _, _ = pygame.mouse.get_pressed()
-
-            if left == 1:
-                mouse = pygame.mouse.get_pos()
-                for i in range(HEIGHT):
-                    for j in range(WIDTH):
-                        node = cells[i][j]
-                        if node.rect.collidepoint(mouse) and not node.obstruction:
-                            # Marks the node as start
-                            if not node.start:
-                                node.end = True
-                                grid.end = node
-                                end = False
-                                time.sleep(0.3)
+            for pressed, mouse, dragging in inputs:
+                node = grid.node_at(mouse)
+                if pressed == 1 and not dragging and node is not None and not node.obstruction and not node.start:
+                    # Marks the node as end
+                    node.end = True
+                    grid.end = node
+                    end = False
+                    break
 
         # Show instructions to draw barriers
         elif barriers:
 
-            # Write instructions
-            instruction = medium_font.render("Draw barriers", True, WHITE)
-            instruction_rect = instruction.get_rect()
-            instruction_rect.center = ((width / 3), 50)
-            screen.blit(instruction, instruction_rect)
-
-            # Search button
-            search_button = pygame.Rect((width * (1 / 2)) + BOARD_PADDING, 30, 100, 40)
-            search_button_text = medium_font.render("Search", True, BLACK)
-            search_button_rect = search_button_text.get_rect()
-            search_button_rect.center = search_button.center
-            pygame.draw.rect(screen, WHITE, search_button)
-            screen.blit(search_button_text, search_button_rect)
-
-            # Reset button
-            reset_button = pygame.Rect(
-                (width * (1 / 2)) + BOARD_PADDING + 115, 30, 100, 40
-            )
-            reset_button_text = medium_font.render("Reset", True, BLACK)
-            reset_button_rect = reset_button_text.get_rect()
-            reset_button_rect.center = reset_button.center
-            pygame.draw.rect(screen, WHITE, reset_button)
-            screen.blit(reset_button_text, reset_button_rect)
+            # Number keys pick what to paint
+            for event in events:
+                if event.type == pygame.KEYDOWN and pygame.K_0 <= event.key <= pygame.K_9:
+                    brush = event.key - pygame.K_0
+
+            screen.blit(*(paint_terrain[brush] if brush else draw_barriers))
+            screen.blit(*brush_keys)
+            screen.blit(*search_button)
+            screen.blit(*reset_button)
 
             # Draw the board
-            draw_board(cells, board_origin, cell_size, screen, grid)
+            grid.draw_board()
 
             # Check buttons or grid pressed
-            left, _, _ = pygame.mouse.get_pressed()
+            for pressed, mouse, dragging in inputs:
 
-            if left == 1:
-                mouse = pygame.mouse.get_pos()
+                # Right click erases barriers and terrain alike
+                if pressed == 3:
+                    stroke, _ = edit_barrier(grid, stroke if dragging else None, mouse, False, 1)
+                    continue
 
                 # If search button is clicked, start the search
-                if search_button.collidepoint(mouse):
+                if not dragging and search_button[1].collidepoint(mouse):
                     barriers = False
-                    time.sleep(0.3)
+                    break
 
-                elif reset_button.collidepoint(mouse):
+                elif not dragging and reset_button[1].collidepoint(mouse):
 
-                    # Re-initialise all the variables
-                    grid = Grid(HEIGHT, WIDTH, board_origin, cell_size, pin, flag)
+                    # Start again from the loaded map or maze, if any,
+                    # dropping the barriers drawn since
+                    grid.reset(keep_obstacles=False)
                     if mask is not None:
                         grid.generate_maze(mask)
-                    cells = grid.cells
+                    if terrain is not None:
+                        grid.generate_terrain(terrain)
                     start = True
                     end = True
                     barriers = True
-                else:
-                    for i in range(HEIGHT):
-                        for j in range(WIDTH):
-                            node = cells[i][j]
-                            if node.rect.collidepoint(mouse):
-                                if node.start or node.end:
-                                    continue
-                                else:
-                                    # Marks the node as an obstruction
-                                    node.obstruction = True
-
-        # Show search
-        elif search:
+                    break
 
-            # Write instructions
-            instruction = medium_font.render("Searching...", True, WHITE)
-            instruction_rect = instruction.get_rect()
-            instruction_rect.center = ((width / 2), 50)
-            screen.blit(instruction, instruction_rect)
-
-            algos = {
-                "A* search": grid.asearch,
-                "Djikstra's": grid.djikstra,
-                "Greedy": grid.greedy,
-                "Breadth First Search": grid.bfs,
-                "Depth First Search": grid.dfs,
-            }
-
-            # Start algorithm search depending on input
-            algo = algorithms[algorithm.lower()]
-
-            if algos[algo]():
-                found = True
-                path = True
-                search = False
-            else:
-                search = False
+                elif brush:
+                    # Paints the terrain along the stroke, clearing barriers
+                    stroke, _ = edit_barrier(grid, stroke if dragging else None, mouse, False, brush)
+
+                else:
+                    # Marks the nodes along the stroke as obstructions, a
+                    # press starting a new stroke
+                    stroke, _ = edit_barrier(grid, stroke if dragging else None, mouse, True)
 
-        # Once the node has been found
-        elif found:
+        # Run every algorithm at once, showing how many have finished
+        elif search and args.race:
 
-            # Write instructions
-            instruction = medium_font.render("Path Found!", True, WHITE)
-            instruction_rect = instruction.get_rect()
-            instruction_rect.center = ((width / 3), 50)
-            screen.blit(instruction, instruction_rect)
+            if args.save:
+                maps.save(args.save, grid.board.obstruction.reshape(rows, columns))
 
-            # Reset button
-            reset_button = pygame.Rect(
-                (width * (1 / 2)) + BOARD_PADDING + 30, 30, 100, 40
+            # The map as it was raced, which the boards of the results are drawn from
+            raced = (
+                grid.board.obstruction.reshape(rows, columns).copy(),
+                grid.board.cost.reshape(rows, columns).copy(),
             )
-            reset_button_text = medium_font.render("Reset", True, BLACK)
-            reset_button_rect = reset_button_text.get_rect()
-            reset_button_rect.center = reset_button.center
-            pygame.draw.rect(screen, WHITE, reset_button)
-            screen.blit(reset_button_text, reset_button_rect)
+            laps = []
 
-            # Draw the path
-            grid.find_path()
+            for lap in race.race(*raced, grid.start.coords(), grid.end.coords(), processes=args.processes):
+                laps.append(lap)
+                pygame.event.pump()
+                screen.fill(BLACK)
+                screen.blit(*label(small_font, f"Racing: {len(laps)} finished, last {lap.name}", ((width / 2), 50)))
+                grid.draw_board()
+                pygame.display.flip()
 
-            # Draw the board
-            draw_board(cells, board_origin, cell_size, screen, grid)
+            found = any(lap.result.found for lap in laps)
+            search = False
+            redraw = 2
 
-            # Check reset button pressed
-            left, _, _ = pygame.mouse.get_pressed()
+        # Show search, stepping it along as fast as the speed allows
+        elif search:
 
-            if left == 1:
-                mouse = pygame.mouse.get_pos()
+            if not running:
+                if args.save:
+                    maps.save(args.save, grid.board.obstruction.reshape(rows, columns))
+
+                # Start algorithm search depending on input
+                grid.begin(methods[algorithms[algorithm.lower()]])
+                running = True
+                paused = False
+                progress = 0.0
+
+            for event in events:
+                if event.type != pygame.KEYDOWN:
+                    continue
+
+                if event.key == pygame.K_SPACE:
+                    paused = not paused
+                elif event.key == pygame.K_n:
+                    paused = True
+                    grid.advance(1)
+                elif event.key == pygame.K_f and speed is not None:
+                    speed = None if speed * 2 > MAX_SEARCH_SPEED else speed * 2
+                elif event.key == pygame.K_s:
+                    speed = MAX_SEARCH_SPEED if speed is None else max(speed // 2, 1)
+                elif event.key == pygame.K_ESCAPE:
+                    grid.cancel()
+
+            for pressed, mouse, dragging in inputs:
+                if pressed == 1 and not dragging and cancel_button[1].collidepoint(mouse):
+                    grid.cancel()
+
+            if not grid.searching and grid.result is None:
+                # Cancelled, so go back to editing the barriers
+                running = False
+                barriers = True
+
+            elif paused:
+                progress = 0.0
+
+            elif speed is None:
+                grid.advance(budget=FRAME_BUDGET)
 
-                if reset_button.collidepoint(mouse):
+            else:
+                progress += speed * elapsed
+                grid.advance(int(progress), FRAME_BUDGET)
+                progress -= int(progress)
 
-                    # Re-initialise all the variables
-                    grid = Grid(HEIGHT, WIDTH, board_origin, cell_size, pin, flag)
-                    if mask is not None:
-                        grid.generate_maze(mask)
-                    cells = grid.cells
-                    start = True
-                    end = True
-                    barriers = True
-                    search = True
+            if running and not grid.searching:
+                running = False
+                found = path = grid.result.found
+                search = False
+
+                if grid.trace is not None:
+                    grid.trace.save(args.record)
+
+            elif running:
+                rate = "instant" if speed is None else f"{speed}/s"
+                status = f"Searching: {grid.taken} steps, {rate}{', paused' if paused else ''}"
+                screen.blit(*label(small_font, status, ((width / 3), 50)))
+                screen.blit(*search_keys)
+                screen.blit(*cancel_button)
+
+            grid.draw_board()
+
+            # Keep stepping without waiting for input, and show how it ended
+            if not paused or not running:
+                redraw = 2
 
+        # Once the search has finished, with or without a path
         else:
-            # Write instructions
-            instruction = medium_font.render("No path found...", True, WHITE)
-            instruction_rect = instruction.get_rect()
-            instruction_rect.center = ((width / 3), 50)
-            screen.blit(instruction, instruction_rect)
-
-            # Reset button
-            reset_button = pygame.Rect(
-                (width * (1 / 2)) + BOARD_PADDING + 30, 30, 100, 40
-            )
-            reset_button_text = medium_font.render("Reset", True, BLACK)
-            reset_button_rect = reset_button_text.get_rect()
-            reset_button_rect.center = reset_button.center
-            pygame.draw.rect(screen, WHITE, reset_button)
-            screen.blit(reset_button_text, reset_button_rect)
 
-            # Draw the board
-            draw_board(cells, board_origin, cell_size, screen, grid)
+            screen.blit(*(path_found if found else no_path))
+            screen.blit(*result_reset_button)
 
-            # Check reset button pressed
-            left, _, _ = pygame.mouse.get_pressed()
+            if laps:
+                for event in events:
+                    if event.type == pygame.KEYDOWN and event.key == pygame.K_TAB:
+                        race_boards = not race_boards
 
-            if left == 1:
-                mouse = pygame.mouse.get_pos()
+                screen.blit(*race_keys)
+                draw_race(screen, tiny_font if race_boards else table_font, laps, *raced, race_boards)
 
-                if reset_button.collidepoint(mouse):
+            else:
+                # Draw the path
+                if found:
+                    grid.find_path()
 
-                    # Re-initialise all the variables
-                    grid = Grid(HEIGHT, WIDTH, board_origin, cell_size, pin, flag)
-                    cells = grid.cells
-                    if mask is not None:
-                        grid.generate_maze(mask)
+                # Draw the board
+                grid.draw_board()
+
+            # Check reset button or grid pressed
+            for pressed, mouse, dragging in inputs:
+
+                if pressed == 1 and not dragging and result_reset_button[1].collidepoint(mouse):
+
+                    # Keep the barriers, so the next query runs on the same map
+                    grid.reset()
                     start = True
                     end = True
                     barriers = True
                     search = True
+                    found = False
+                    laps = []
+                    break
+
+                # Incremental algorithms replan straight away after an edit,
+                # left click adding a barrier and right click removing one
+                elif not args.race and algorithms[algorithm.lower()] in incremental:
+                    stroke, changed = edit_barrier(grid, stroke if dragging else None, mouse, pressed == 1)
+                    if changed:
+                        found = False
+                        search = True
 
         pygame.display.flip()
 
-
 if __name__ == "__main__":
     main()
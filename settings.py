@@ -1,5 +1,3 @@
-import pygame
-
 # Initialise variables
 HEIGHT = 25
 WIDTH = 40
@@ -8,6 +6,13 @@ WHITE = (255, 255, 255)
 GREEN = (0, 255, 0)
 RED = (255, 0, 0)
 BLUE = (0, 0, 255)
+YELLOW = (255, 255, 0)
+PURPLE = (160, 32, 240)
+MUD = (150, 95, 40)
+
+# Terrain costs run from 1 for plain ground, drawn black, to MAX_TERRAIN and
+# above, drawn in full MUD
+MAX_TERRAIN = 9
 
 # algorithms
 algorithms = {
@@ -19,8 +24,44 @@ algorithms = {
     "breadth first search": "Breadth First Search",
     "depth first search": "Depth First Search",
     "greedy": "Greedy",
+    "bi-astar": "Bidirectional A* search",
+    "bi-djikstra": "Bidirectional Djikstra's",
+    "bi-bfs": "Bidirectional Breadth First Search",
+    "jps": "Jump Point Search",
+    "jump point search": "Jump Point Search",
+    "hpa": "Hierarchical A*",
+    "hierarchical": "Hierarchical A*",
+    "dstar": "D* Lite",
+    "d* lite": "D* Lite",
+    "wavefront": "Wavefront Breadth First Search",
+    "dial": "Dial's",
+    "bucket": "Dial's",
+    "field": "Distance field",
+    "distance field": "Distance field",
+}
+
+# Solver and Grid method behind each algorithm
+methods = {
+    "A* search": "asearch",
+    "Djikstra's": "djikstra",
+    "Breadth First Search": "bfs",
+    "Depth First Search": "dfs",
+    "Greedy": "greedy",
+    "Bidirectional A* search": "bidirectional_asearch",
+    "Bidirectional Djikstra's": "bidirectional_djikstra",
+    "Bidirectional Breadth First Search": "bidirectional_bfs",
+    "Jump Point Search": "jps",
+    "Hierarchical A*": "hpa",
+    "D* Lite": "dstar",
+    "Wavefront Breadth First Search": "wavefront",
+    "Dial's": "dial",
+    "Distance field": "field",
 }
 
+# Algorithms that repair their previous search, so barriers can still be
+# edited once a search has finished
+incremental = {"D* Lite"}
+
 # Compute board size
 BOARD_PADDING = 20
 size = width, height = 600, 500
@@ -28,3 +69,11 @@ board_width = width - (BOARD_PADDING * 2)
 board_height = height - (BOARD_PADDING * 2)
 cell_size = int(min(board_width / WIDTH, board_height / HEIGHT))
 board_origin = (BOARD_PADDING, BOARD_PADDING + 100)
+
+# Frame rate cap of the visualiser
+FPS = 60
+
+# Area given to the board when it is drawn through a viewport, and the
+# smallest cells worth drawing without one
+viewport_size = (board_width, height - board_origin[1] - BOARD_PADDING)
+MIN_CELL_SIZE = 6
@@ -0,0 +1,897 @@
+"""
+Headless search engine used by the visualiser. Nothing in this module imports
+pygame, so grids can be solved from scripts, benchmarks or servers without a
+display. The GUI attaches through the optional observer callback.
+"""
+import heapq
+import numpy as np
+
+from collections import deque
+from functools import wraps
+from math import dist, sqrt
+from dstar import DStarLite
+from fields import FieldStore
+from hpa import ClusterMap
+from board import Board, DIRECTIONS, OPENED, CLOSED, OPENED_BACK, CLOSED_BACK
+from utils import IndexedHeap
+from wavefront import spread, trace
+
+
+# Events passed to the observer as observer(event, index)
+OPEN = 0
+CLOSE = 1
+STEP = 2
+OPEN_BACK = 3
+CLOSE_BACK = 4
+
+
+class Result:
+    """The outcome of a single search."""
+
+    def __init__(self, found: bool, path: list, expanded: int, generated: int, peak_open: int = 0,
+                 reopened: int = 0, discarded: int = 0, peak_closed: int = None, cost: float = None):
+
+        self.found = found
+
+        # Cells from start to end inclusive, empty if no path was found, and
+        # their cost, which is the length unless given with terrain costs
+        self.path = path
+        self.cost = sum(dist(a, b) for a, b in zip(path, path[1:])) if cost is None else cost
+
+        # Expansion statistics
+        self.expanded = expanded
+        self.generated = generated
+        self.peak_open = peak_open
+        self.reopened = reopened
+        self.discarded = discarded
+        self.peak_closed = expanded if peak_closed is None else peak_closed
+
+    @property
+    def pushes(self) -> int:
+        """Frontier insertions: every generated cell, plus every re-opening."""
+        return self.generated + self.reopened
+
+    @property
+    def pops(self) -> int:
+        """Frontier removals: every expanded cell, plus stale entries thrown away."""
+        return self.expanded + self.discarded
+
+    def __repr__(self) -> str:
+        return (
+            f"Result(found={self.found}, length={len(self.path)}, "
+            f"cost={self.cost:.2f}, expanded={self.expanded})"
+        )
+
+
+def stepwise(search):
+    """
+    Turns a search written as a generator, which yields the index of each cell
+    once its expansion is complete and returns the Result, into a method that
+    runs it to the end. The generator stays available as the method's steps
+    attribute, so callers can advance the search themselves with Solver.steps.
+    """
+
+    @wraps(search)
+    def run(self, start: tuple, end: tuple) -> Result:
+        return self.finish(search(self, start, end))
+
+    run.steps = search
+    return run
+
+
+class Solver:
+    """
+    Runs the search algorithms on a Board, or on an obstacle mask where a truthy
+    value marks an obstruction. Cells are given as (row, column) tuples, while
+    observers receive flat cell indices.
+    """
+
+    def __init__(self, board, observer=None):
+
+        if not isinstance(board, Board):
+            board = Board.from_mask(board)
+
+        self.board = board
+        self.height = board.height
+        self.width = board.width
+
+        # Called with (event, index) as the search progresses
+        self.observer = observer
+
+        # Cluster abstraction for hierarchical searches, built on first use
+        self.clusters = None
+
+        # Incremental planner, kept while queries share the same end
+        self.planner = None
+
+        # Distance fields of recent ends, built on first use
+        self.fields = None
+
+        # Counters for the current search
+        self.expanded = 0
+        self.generated = 0
+        self.peak_open = 0
+        self.reopened = 0
+        self.discarded = 0
+
+    def notify(self, event: int, index: int) -> None:
+        """Passes an event on to the observer, if there is one."""
+        if self.observer is not None:
+            self.observer(event, index)
+
+    def step(self, index: int) -> None:
+        """Signals that the expansion of a cell is complete."""
+        self.notify(STEP, index)
+
+    def steps(self, algorithm: str, start: tuple, end: tuple):
+        """
+        Starts the named search without running it. The generator returned
+        yields the index of each cell as its expansion completes, and returns
+        the Result when the search is over. Closing it abandons the search.
+        """
+        return getattr(Solver, algorithm).steps(self, tuple(start), tuple(end))
+
+    def finish(self, steps) -> Result:
+        """Runs a search generator to the end, reporting each step to the observer."""
+        while True:
+            try:
+                index = next(steps)
+            except StopIteration as done:
+                return done.value
+            self.step(index)
+
+    def prepare(self, start: tuple, end: tuple) -> tuple:
+        """Clears the board for a new search and returns the start and end indices."""
+        self.board.clear_search()
+        self.expanded = 0
+        self.generated = 0
+        self.peak_open = 0
+        self.reopened = 0
+        self.discarded = 0
+
+        # The start is set up before it is opened, so it is visited first
+        start, end = self.board.index(*start), self.board.index(*end)
+        self.board.visit(start)
+        return start, end
+
+    def open_cell(self, index: int, backward: bool = False) -> None:
+        """Marks the cell as generated, by the search from the end if backward."""
+        board = self.board
+        if board.stamp[index] != board.generation:
+            board.visit(index)
+
+        board.state[index] |= OPENED_BACK if backward else OPENED
+        self.generated += 1
+        self.peak_open = max(self.peak_open, self.generated - self.expanded)
+        self.notify(OPEN_BACK if backward else OPEN, index)
+
+    def close_cell(self, index: int, backward: bool = False) -> None:
+        """Marks the cell as expanded, by the search from the end if backward."""
+        self.board.state[index] |= CLOSED_BACK if backward else CLOSED
+        self.expanded += 1
+        self.notify(CLOSE_BACK if backward else CLOSE, index)
+
+    def get_neigbours(self, index: int) -> list:
+        """
+        Returns the cells that are vertically, horizontally, and diagonally adjacent to the cell.
+        """
+        return self.board.neighbours(index)
+
+    def trace_path(self, start: int, end: int) -> list:
+        """Follows the parent links back from end to start."""
+        path = [end]
+
+        while path[-1] != start:
+            path.append(int(self.board.parent_index[path[-1]]))
+
+        path.reverse()
+        return [self.board.coords(index) for index in path]
+
+    def splice(self, parent: tuple, meet: int) -> list:
+        """Joins the halves of a bidirectional search where they meet."""
+        forward = [meet]
+        while parent[0][forward[-1]] is not None:
+            forward.append(parent[0][forward[-1]])
+
+        backward = []
+        current = parent[1][meet]
+        while current is not None:
+            backward.append(current)
+            current = parent[1][current]
+
+        return forward[::-1] + backward
+
+    def result(self, found: bool, start: int, end: int, path: list = None) -> Result:
+        """Packages the outcome of the current search."""
+        if not found:
+            path = []
+        elif path is None:
+            path = self.trace_path(start, end)
+        else:
+            path = [self.board.coords(index) for index in path]
+
+        return self.package(found, path)
+
+    def package(self, found: bool, path: list) -> Result:
+        """Builds the Result of a (row, column) path from the solver's counters."""
+        # The closed sets only grow during a search, so their final size is the peak
+        peak_closed = int(np.count_nonzero(self.board.state & (CLOSED | CLOSED_BACK)))
+        return Result(
+            found, path, self.expanded, self.generated, self.peak_open,
+            self.reopened, self.discarded, peak_closed, self.board.path_cost(path),
+        )
+
+    @stepwise
+    def asearch(self, start: tuple, end: tuple) -> Result:
+        """A* search algorithm, over the terrain costs."""
+        start, end = self.prepare(start, end)
+        board = self.board
+        terrain = board.cost
+        target = board.coords(end)
+
+        # The distance to the end only stays admissible at the cheapest terrain
+        scale = board.min_cost()
+
+        # Push the starting cell onto the frontier
+        board.f[start] = dist(board.coords(start), target) * scale
+        frontier = IndexedHeap()
+        frontier.push(start, board.f[start])
+        self.open_cell(start)
+
+        while frontier:
+
+            # Take the cell with the smallest f value
+            current, _ = frontier.pop()
+            self.close_cell(current)
+
+            # Check current cell is the goal
+            if current == end:
+                return self.result(True, start, end)
+
+            for offset, cost in board.moves[board.adjacency[current]]:
+                neighbour = current + offset
+
+                # Check whether neighbour has been searched
+                if board.state[neighbour] & CLOSED:
+                    continue
+
+                coords = board.coords(neighbour)
+                tentative_g_score = board.g[current] + cost * terrain[neighbour]
+
+                if neighbour not in frontier:
+                    self.open_cell(neighbour)
+
+                elif tentative_g_score >= board.g[neighbour]:
+                    continue
+
+                else:
+                    self.reopened += 1
+
+                board.g[neighbour] = tentative_g_score
+                board.f[neighbour] = tentative_g_score + dist(coords, target) * scale
+                board.parent_index[neighbour] = current
+                frontier.push(neighbour, board.f[neighbour])
+
+            yield current
+
+        # If frontier no longer has cells
+        return self.result(False, start, end)
+
+    @stepwise
+    def djikstra(self, start: tuple, end: tuple) -> Result:
+        """Djikstra's algorithm, over the terrain costs."""
+        start, end = self.prepare(start, end)
+        board = self.board
+        terrain = board.cost
+
+        # Use a priority queue to keep track of the next cell to visit
+        queue = [(0.0, start)]
+        self.open_cell(start)
+
+        while queue:
+
+            # Get the cell with the smallest distance from the start cell
+            current_distance, current = heapq.heappop(queue)
+
+            # Skip cells that have already been visited
+            if board.state[current] & CLOSED:
+                self.discarded += 1
+                continue
+
+            # Mark the current cell as visited
+            self.close_cell(current)
+
+            # Check if reached end
+            if current == end:
+                return self.result(True, start, end)
+
+            for offset, cost in board.moves[board.adjacency[current]]:
+                neighbour = current + offset
+
+                if board.state[neighbour] & CLOSED:
+                    continue
+
+                # A move costs its length times the terrain cost of the cell it enters
+                new_distance = current_distance + cost * terrain[neighbour]
+
+                if not board.state[neighbour] & OPENED:
+                    self.open_cell(neighbour)
+                elif new_distance >= board.g[neighbour]:
+                    continue
+                else:
+                    self.reopened += 1
+
+                board.parent_index[neighbour] = current
+                board.g[neighbour] = new_distance
+                heapq.heappush(queue, (new_distance, neighbour))
+
+            yield current
+
+        # Search unsuccessful
+        return self.result(False, start, end)
+
+    @stepwise
+    def dial(self, start: tuple, end: tuple) -> Result:
+        """
+        Djikstra's algorithm with a bucket queue (Dial's algorithm) in place of
+        the binary heap. Each bucket holds a range of distances as wide as the
+        cheapest move, so no cell in the current bucket can improve another and
+        they are taken in any order. The buckets are reused in a ring, wide
+        enough for the dearest move.
+        """
+        start, end = self.prepare(start, end)
+        board = self.board
+        terrain = board.cost
+
+        width = board.min_cost()
+        count = int(sqrt(2) * int(terrain.max()) / width) + 2
+        buckets = [[] for _ in range(count)]
+
+        # Distances are kept exactly here, as board.g only holds float32
+        g = {start: 0.0}
+        buckets[0].append(start)
+        pending = 1
+        position = 0
+        self.open_cell(start)
+
+        while pending:
+
+            # Move on to the next bucket with anything in it
+            bucket = buckets[position % count]
+            if not bucket:
+                position += 1
+                continue
+
+            current = bucket.pop()
+            pending -= 1
+
+            # Cells improved after being queued are still in their old bucket
+            if board.state[current] & CLOSED:
+                self.discarded += 1
+                continue
+
+            self.close_cell(current)
+
+            if current == end:
+                return self.result(True, start, end)
+
+            for offset, cost in board.moves[board.adjacency[current]]:
+                neighbour = current + offset
+
+                if board.state[neighbour] & CLOSED:
+                    continue
+
+                new_distance = g[current] + cost * int(terrain[neighbour])
+
+                if neighbour not in g:
+                    self.open_cell(neighbour)
+                elif new_distance >= g[neighbour]:
+                    continue
+                else:
+                    self.reopened += 1
+
+                g[neighbour] = new_distance
+                board.g[neighbour] = new_distance
+                board.parent_index[neighbour] = current
+                buckets[int(new_distance / width) % count].append(neighbour)
+                pending += 1
+
+            yield current
+
+        return self.result(False, start, end)
+
+    @stepwise
+    def bfs(self, start: tuple, end: tuple) -> Result:
+        """Breadth first search algorithm."""
+        start, end = self.prepare(start, end)
+        board = self.board
+        queue = deque([start])
+        self.open_cell(start)
+
+        while queue:
+
+            # Pop the first element in the queue
+            current = queue.popleft()
+            self.close_cell(current)
+
+            for neighbour in self.get_neigbours(current):
+
+                # Check that neighbour has not been seen before
+                if not board.state[neighbour] & OPENED:
+                    self.open_cell(neighbour)
+                    board.parent_index[neighbour] = current
+
+                    # Check if it's the goal cell
+                    if neighbour == end:
+                        return self.result(True, start, end)
+
+                    queue.append(neighbour)
+
+            yield current
+
+        return self.result(False, start, end)
+
+    @stepwise
+    def dfs(self, start: tuple, end: tuple) -> Result:
+        """Depth first search algorithm."""
+        start, end = self.prepare(start, end)
+        board = self.board
+        stack = [start]
+        self.open_cell(start)
+
+        while stack:
+
+            # Pop the element from the stack and mark it as visited
+            current = stack.pop()
+            if not board.state[current] & CLOSED:
+                self.close_cell(current)
+            else:
+                self.discarded += 1
+
+            for neighbour in self.get_neigbours(current):
+
+                if not board.state[neighbour] & OPENED:
+                    self.open_cell(neighbour)
+                    board.parent_index[neighbour] = current
+                elif not board.state[neighbour] & CLOSED:
+                    self.reopened += 1
+
+                if not board.state[neighbour] & CLOSED:
+                    if neighbour == end:
+                        return self.result(True, start, end)
+
+                    stack.append(neighbour)
+
+            yield current
+
+        # Search unsuccessful
+        return self.result(False, start, end)
+
+    @stepwise
+    def greedy(self, start: tuple, end: tuple) -> Result:
+        """Greedy best first search, guided by the Manhattan distance to the end."""
+        start, end = self.prepare(start, end)
+        board = self.board
+        row, column = board.coords(end)
+
+        def heuristic(index: int) -> int:
+            i, j = divmod(index, self.width)
+            return abs(i - row) + abs(j - column)
+
+        # Push the cell onto the frontier, keeping the heuristic in f
+        board.f[start] = heuristic(start)
+        frontier = IndexedHeap()
+        frontier.push(start, board.f[start])
+        self.open_cell(start)
+
+        while frontier:
+
+            # Take the cell with the minimum heuristic value
+            current, _ = frontier.pop()
+
+            # Check whether current cell is the end
+            if current == end:
+                return self.result(True, start, end)
+
+            self.close_cell(current)
+
+            for neighbour in self.get_neigbours(current):
+                if not board.state[neighbour] & OPENED:
+                    self.open_cell(neighbour)
+                    board.f[neighbour] = heuristic(neighbour)
+                    board.parent_index[neighbour] = current
+                    frontier.push(neighbour, board.f[neighbour])
+
+            yield current
+
+        # Search unsuccessful
+        return self.result(False, start, end)
+
+    def bidirectional(self, start: tuple, end: tuple, guided: bool) -> Result:
+        """
+        Best first search run from both ends at once, alternating towards the
+        side with the smaller frontier. Guided searches use the average of the
+        two Euclidean heuristics as a potential, ordering the forward frontier
+        by g + p and the backward one by g - p, so that both behave like
+        Djikstra's on the same reduced graph. Either way the search stops once
+        the two smallest keys add up to at least the best path found. Moves
+        are weighted by the terrain cost of the cell they enter.
+        """
+        start, end = self.prepare(start, end)
+        board = self.board
+        terrain = board.cost
+        scale = board.min_cost()
+
+        # Everything is kept per side, with 0 the forward and 1 the backward search
+        roots = (start, end)
+        closed = (CLOSED, CLOSED_BACK)
+        g = ({start: 0.0}, {end: 0.0})
+        parent = ({start: None}, {end: None})
+        frontier = (IndexedHeap(), IndexedHeap())
+        source, target = board.coords(start), board.coords(end)
+
+        def key(side: int, index: int) -> float:
+            if not guided:
+                return g[side][index]
+            coords = board.coords(index)
+            potential = (dist(coords, target) - dist(coords, source)) / 2 * scale
+            return g[side][index] + (potential if side == 0 else -potential)
+
+        for side in (0, 1):
+            frontier[side].push(roots[side], key(side, roots[side]))
+            self.open_cell(roots[side], side)
+
+        # Cheapest complete path seen so far, as its cost and meeting cell
+        best = 0.0 if start == end else float("inf")
+        meet = start
+
+        while frontier[0] and frontier[1]:
+
+            # Check whether any unexpanded cell could still improve the path
+            if frontier[0].peek()[1] + frontier[1].peek()[1] >= best:
+                break
+
+            side = 0 if len(frontier[0]) <= len(frontier[1]) else 1
+            current, _ = frontier[side].pop()
+            self.close_cell(current, side)
+
+            for offset, cost in board.moves[board.adjacency[current]]:
+                neighbour = current + offset
+
+                if board.state[neighbour] & closed[side]:
+                    continue
+
+                # Going backwards the move enters current rather than neighbour
+                entered = neighbour if side == 0 else current
+                tentative_g_score = g[side][current] + cost * terrain[entered]
+
+                if neighbour not in g[side]:
+                    self.open_cell(neighbour, side)
+                elif tentative_g_score >= g[side][neighbour]:
+                    continue
+                else:
+                    self.reopened += 1
+
+                g[side][neighbour] = tentative_g_score
+                parent[side][neighbour] = current
+                frontier[side].push(neighbour, key(side, neighbour))
+
+                # The other search has reached this cell, giving a complete path
+                if neighbour in g[1 - side]:
+                    total = tentative_g_score + g[1 - side][neighbour]
+                    if total < best:
+                        best, meet = total, neighbour
+
+            yield current
+
+        found = best < float("inf")
+        return self.result(found, start, end, self.splice(parent, meet) if found else None)
+
+    @stepwise
+    def bidirectional_asearch(self, start: tuple, end: tuple) -> Result:
+        """A* search run from the start and the end at the same time."""
+        return (yield from self.bidirectional(start, end, guided=True))
+
+    @stepwise
+    def bidirectional_djikstra(self, start: tuple, end: tuple) -> Result:
+        """Djikstra's algorithm run from the start and the end at the same time."""
+        return (yield from self.bidirectional(start, end, guided=False))
+
+    @stepwise
+    def bidirectional_bfs(self, start: tuple, end: tuple) -> Result:
+        """
+        Breadth first search run from both ends, expanding a whole layer of the
+        smaller frontier at a time. The layer in which the two searches first
+        touch is finished so that the meeting with the fewest steps is used.
+        """
+        start, end = self.prepare(start, end)
+        board = self.board
+
+        depth = ({start: 0}, {end: 0})
+        parent = ({start: None}, {end: None})
+        layers = ([start], [end])
+        self.open_cell(start)
+        self.open_cell(end, True)
+
+        if start == end:
+            return self.result(True, start, end, [start])
+
+        while layers[0] and layers[1]:
+
+            side = 0 if len(layers[0]) <= len(layers[1]) else 1
+            best, meet = float("inf"), None
+            next_layer = []
+
+            for current in layers[side]:
+                self.close_cell(current, side)
+
+                for neighbour in board.neighbours(current):
+                    if neighbour in depth[side]:
+                        continue
+
+                    depth[side][neighbour] = depth[side][current] + 1
+                    parent[side][neighbour] = current
+                    self.open_cell(neighbour, side)
+                    next_layer.append(neighbour)
+
+                    # Check whether the other search has already seen it
+                    if neighbour in depth[1 - side]:
+                        total = depth[side][neighbour] + depth[1 - side][neighbour]
+                        if total < best:
+                            best, meet = total, neighbour
+
+                yield current
+
+            if meet is not None:
+                return self.result(True, start, end, self.splice(parent, meet))
+
+            layers = (next_layer, layers[1]) if side == 0 else (layers[0], next_layer)
+
+        return self.result(False, start, end)
+
+    def jump(self, i: int, j: int, di: int, dj: int, goal: tuple, blocked) -> tuple:
+        """
+        Steps from (i, j) in direction (di, dj) until reaching the goal, a cell
+        with a forced neighbour, or an obstruction, returning the jump point
+        or None. Diagonal steps also look for jump points straight ahead.
+        """
+        height, width = self.height, self.width
+
+        def free(i: int, j: int) -> bool:
+            return 0 <= i < height and 0 <= j < width and not blocked[i * width + j]
+
+        while True:
+            i += di
+            j += dj
+
+            if not free(i, j):
+                return None
+            if (i, j) == goal:
+                return i, j
+
+            if di and dj:
+                if (free(i + di, j - dj) and not free(i, j - dj)) or (
+                    free(i - di, j + dj) and not free(i - di, j)
+                ):
+                    return i, j
+                if self.jump(i, j, 0, dj, goal, blocked) or self.jump(i, j, di, 0, goal, blocked):
+                    return i, j
+
+            elif di:
+                if (free(i + di, j + 1) and not free(i, j + 1)) or (
+                    free(i + di, j - 1) and not free(i, j - 1)
+                ):
+                    return i, j
+
+            elif (free(i + 1, j + dj) and not free(i + 1, j)) or (
+                free(i - 1, j + dj) and not free(i - 1, j)
+            ):
+                return i, j
+
+    def prune(self, index: int, blocked) -> list:
+        """
+        Returns the directions worth exploring from a jump point, given the
+        direction it was reached from: the natural neighbours plus any forced
+        ones next to an obstruction.
+        """
+        board = self.board
+        height, width = self.height, self.width
+        i, j = board.coords(index)
+        parent = board.parent_index[index]
+
+        if parent < 0:
+            return [(di, dj) for di, dj in DIRECTIONS]
+
+        def free(i: int, j: int) -> bool:
+            return 0 <= i < height and 0 <= j < width and not blocked[i * width + j]
+
+        pi, pj = board.coords(parent)
+        di = (i > pi) - (i < pi)
+        dj = (j > pj) - (j < pj)
+        directions = []
+
+        if di and dj:
+            directions += [(0, dj), (di, 0), (di, dj)]
+            if not free(i, j - dj):
+                directions.append((di, -dj))
+            if not free(i - di, j):
+                directions.append((-di, dj))
+        elif di:
+            directions.append((di, 0))
+            for side in (1, -1):
+                if not free(i, j + side):
+                    directions.append((di, side))
+        else:
+            directions.append((0, dj))
+            for side in (1, -1):
+                if not free(i + side, j):
+                    directions.append((side, dj))
+
+        return directions
+
+    @stepwise
+    def jps(self, start: tuple, end: tuple) -> Result:
+        """
+        Jump Point Search: A* on the uniform 8-connected grid that skips over
+        symmetric paths, only putting jump points on the frontier.
+        """
+        start, end = self.prepare(start, end)
+        board = self.board
+        goal = board.coords(end)
+        blocked = board.obstruction.data
+
+        def octile(a: tuple, b: tuple) -> float:
+            di, dj = abs(a[0] - b[0]), abs(a[1] - b[1])
+            return sqrt(2) * min(di, dj) + abs(di - dj)
+
+        board.f[start] = octile(board.coords(start), goal)
+        frontier = IndexedHeap()
+        frontier.push(start, board.f[start])
+        self.open_cell(start)
+
+        while frontier:
+
+            current, _ = frontier.pop()
+            self.close_cell(current)
+
+            if current == end:
+                return self.result(True, start, end, self.interpolate(start, end))
+
+            i, j = board.coords(current)
+
+            for di, dj in self.prune(current, blocked):
+                point = self.jump(i, j, di, dj, goal, blocked)
+                if point is None:
+                    continue
+
+                successor = board.index(*point)
+                if board.state[successor] & CLOSED:
+                    continue
+
+                tentative_g_score = board.g[current] + octile((i, j), point)
+
+                if successor not in frontier:
+                    self.open_cell(successor)
+                elif tentative_g_score >= board.g[successor]:
+                    continue
+                else:
+                    self.reopened += 1
+
+                board.g[successor] = tentative_g_score
+                board.f[successor] = tentative_g_score + octile(point, goal)
+                board.parent_index[successor] = current
+                frontier.push(successor, board.f[successor])
+
+            yield current
+
+        return self.result(False, start, end)
+
+    def interpolate(self, start: int, end: int) -> list:
+        """Fills in the straight and diagonal runs between consecutive jump points."""
+        points = [end]
+        while points[-1] != start:
+            points.append(int(self.board.parent_index[points[-1]]))
+        points.reverse()
+
+        path = [start]
+        for a, b in zip(points, points[1:]):
+            (i, j), (bi, bj) = self.board.coords(a), self.board.coords(b)
+            di = (bi > i) - (bi < i)
+            dj = (bj > j) - (bj < j)
+            while (i, j) != (bi, bj):
+                i += di
+                j += dj
+                path.append(self.board.index(i, j))
+
+        return path
+
+    @stepwise
+    def hpa(self, start: tuple, end: tuple) -> Result:
+        """
+        Hierarchical A* over the cluster abstraction of the board. Paths are
+        close to, but not always exactly, the shortest.
+        """
+        start, end = self.prepare(start, end)
+
+        if self.clusters is None:
+            self.clusters = ClusterMap(self.board)
+
+        path = yield from self.clusters.search(start, end, self)
+        return self.result(path is not None, start, end, path)
+
+    @stepwise
+    def dstar(self, start: tuple, end: tuple) -> Result:
+        """
+        D* Lite. The planner survives between calls with the same end, so after
+        cells are obstructed or cleared only the affected part of its search
+        tree is repaired, and only those expansions are reported.
+        """
+        start, end = self.prepare(start, end)
+
+        if self.planner is None or self.planner.goal != end:
+            if self.planner is not None:
+                self.planner.close()
+            self.planner = DStarLite(self.board, start, end)
+        else:
+            self.planner.move_start(start)
+
+        path = yield from self.planner.replan(self)
+        return self.result(path is not None, start, end, path)
+
+    @stepwise
+    def field(self, start: tuple, end: tuple) -> Result:
+        """
+        Reads the path off a distance field rooted at the end, building the
+        field with a reverse Djikstra's search the first time the end is asked
+        for. Later queries to the same end need no search at all.
+        """
+        start, end = self.prepare(start, end)
+
+        if self.fields is None:
+            self.fields = FieldStore(self.board)
+
+        field = self.fields.get(end)
+        if field is None:
+            field = yield from self.fields.build(end, self)
+
+        path = field.path(start)
+        return self.result(path is not None, start, end, path)
+
+    @stepwise
+    def wavefront(self, start: tuple, end: tuple) -> Result:
+        """
+        Breadth first search that advances the whole frontier at once with
+        array shifts. Each layer is reported as a single step.
+        """
+        start, end = self.prepare(start, end)
+        board = self.board
+
+        mask = board.obstruction.reshape(board.height, board.width)
+        start, end = board.coords(start), board.coords(end)
+        layers = spread(mask, start, end)
+
+        while True:
+            try:
+                indices = next(layers)
+            except StopIteration as done:
+                distance, parents = done.value
+                break
+
+            board.state[indices] |= CLOSED
+            self.expanded += len(indices)
+            self.generated += len(indices)
+            self.peak_open = max(self.peak_open, len(indices))
+
+            if self.observer is not None:
+                for index in indices:
+                    self.notify(CLOSE, int(index))
+            yield int(indices[-1])
+
+        if distance[end] < 0:
+            return self.package(False, [])
+        return self.package(True, trace(parents, end))
+
+
+def solve(mask, start: tuple, end: tuple, algorithm: str = "asearch", observer=None) -> Result:
+    """Solves a single query on the mask, or Board, with the named algorithm."""
+    return getattr(Solver(mask, observer), algorithm)(tuple(start), tuple(end))
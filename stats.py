@@ -0,0 +1,113 @@
+"""
+Instrumentation for searches run through the visualiser. Each search produces
+a SearchStats with the solver's counters and the time it took, split between
+the search itself and redrawing the board while it ran. Stats can be streamed
+to a JSON lines file, and hooks can wrap each search, for example in a
+profiler.
+"""
+import cProfile
+import io
+import json
+import pstats
+import sys
+import time
+
+from contextlib import contextmanager
+
+
+class SearchStats:
+    """Counters and timings of a single search."""
+
+    def __init__(self, algorithm: str, start: tuple, end: tuple, result, search_time: float = 0.0,
+                 render_time: float = 0.0, cached: bool = False):
+
+        self.algorithm = algorithm
+        self.start = tuple(start)
+        self.end = tuple(end)
+        self.cached = cached
+        self.timestamp = time.time()
+
+        # Outcome
+        self.found = result.found
+        self.path_length = len(result.path)
+        self.cost = result.cost
+
+        # Work done, where a push that improves a cell already on the frontier
+        # is a re-opening, and a pop of a cell already expanded is discarded
+        self.expanded = result.expanded
+        self.generated = result.generated
+        self.reopened = result.reopened
+        self.pushes = result.pushes
+        self.pops = result.pops
+        self.peak_open = result.peak_open
+        self.peak_closed = result.peak_closed
+
+        # Seconds spent searching, and redrawing the board while doing so
+        self.search_time = search_time
+        self.render_time = render_time
+
+    @property
+    def total_time(self) -> float:
+        return self.search_time + self.render_time
+
+    def as_dict(self) -> dict:
+        """The stats as plain values, ready for JSON."""
+        values = dict(vars(self))
+        values["cost"] = round(self.cost, 4)
+        values["total_time"] = self.total_time
+        return values
+
+    def __repr__(self) -> str:
+        return (
+            f"SearchStats({self.algorithm}, found={self.found}, expanded={self.expanded}, "
+            f"pushes={self.pushes}, pops={self.pops}, reopened={self.reopened}, "
+            f"search={self.search_time * 1000:.1f}ms, render={self.render_time * 1000:.1f}ms)"
+        )
+
+
+class StatsLog:
+    """Appends SearchStats to a file, one JSON object per line."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, "a")
+
+    def write(self, stats: SearchStats) -> None:
+        self.file.write(json.dumps(stats.as_dict()) + "\n")
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def profiler(path: str = None, limit: int = 20):
+    """
+    Returns a search hook that runs each search under cProfile. The profile is
+    dumped to path, which may contain {algorithm} and {count}, or else the
+    slowest functions are printed to stderr.
+
+    Any callable taking the algorithm name and returning a context manager can
+    be used as a hook, so a sampling profiler can be attached the same way.
+    """
+    count = 0
+
+    @contextmanager
+    def hook(algorithm: str):
+        nonlocal count
+        count += 1
+
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield profile
+        finally:
+            profile.disable()
+
+            if path is not None:
+                profile.dump_stats(path.format(algorithm=algorithm, count=count))
+            else:
+                output = io.StringIO()
+                pstats.Stats(profile, stream=output).sort_stats("cumulative").print_stats(limit)
+                print(f"Profile of {algorithm}:", output.getvalue(), file=sys.stderr)
+
+    return hook
@@ -1,2 +1,165 @@
+import argparse
+
+
 def flatten(l: list):
     return [item for sublist in l for item in sublist]
+
+
+def parse_size(text: str) -> tuple:
+    """Parses a size given as HEIGHTxWIDTH, or a single number for a square grid."""
+    try:
+        parts = [int(part) for part in text.lower().split("x")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size: {text}")
+
+    if len(parts) == 1:
+        parts *= 2
+    if len(parts) != 2 or min(parts) < 2:
+        raise argparse.ArgumentTypeError(f"invalid size: {text}")
+
+    return tuple(parts)
+
+
+def parse_speed(text: str):
+    """Parses a search speed in steps per second, or instant, given as None."""
+    if text.lower() == "instant":
+        return None
+    try:
+        speed = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid speed: {text}")
+
+    if speed < 1:
+        raise argparse.ArgumentTypeError(f"invalid speed: {text}")
+    return speed
+
+
+def line(start: tuple, end: tuple) -> list:
+    """
+    Cells on the straight line between two (row, column) cells, by Bresenham's
+    algorithm. Where the line steps diagonally the cell it passes beside is
+    included too, so that a wall drawn along it cannot be crossed diagonally.
+    """
+    (i, j), (end_i, end_j) = start, end
+    di, dj = abs(end_i - i), abs(end_j - j)
+    step_i = 1 if end_i > i else -1
+    step_j = 1 if end_j > j else -1
+    error = dj - di
+
+    cells = [(i, j)]
+    while (i, j) != (end_i, end_j):
+        twice = 2 * error
+        if twice > -di and twice < dj:
+            # Diagonal step, filling the corner on the side of the longer axis
+            if dj >= di:
+                cells.append((i, j + step_j))
+            else:
+                cells.append((i + step_i, j))
+        if twice > -di:
+            error -= di
+            j += step_j
+        if twice < dj:
+            error += dj
+            i += step_i
+        cells.append((i, j))
+
+    return cells
+
+
+class IndexedHeap:
+    """
+    Binary min-heap that remembers where each item sits, so membership is O(1)
+    and pushing an item that is already queued changes its priority in O(log n).
+    Ties are broken by insertion order.
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.position = {}
+        self.counter = 0
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def __contains__(self, item) -> bool:
+        return item in self.position
+
+    def priority(self, item):
+        """Returns the priority the item is currently queued with."""
+        return self.heap[self.position[item]][0]
+
+    def push(self, item, priority) -> None:
+        """Adds the item, or moves it if it is already queued."""
+        if item in self.position:
+            index = self.position[item]
+            old = self.heap[index][0]
+            self.heap[index][0] = priority
+
+            if priority < old:
+                self.sift_up(index)
+            else:
+                self.sift_down(index)
+            return
+
+        self.heap.append([priority, self.counter, item])
+        self.counter += 1
+        self.position[item] = len(self.heap) - 1
+        self.sift_up(len(self.heap) - 1)
+
+    def peek(self) -> tuple:
+        """Returns the (item, priority) pair with the smallest priority."""
+        priority, _, item = self.heap[0]
+        return item, priority
+
+    def pop(self) -> tuple:
+        """Removes and returns the (item, priority) pair with the smallest priority."""
+        item, priority = self.peek()
+        self.remove(item)
+        return item, priority
+
+    def remove(self, item) -> None:
+        """Takes the item out of the heap."""
+        index = self.position.pop(item)
+        last = self.heap.pop()
+
+        # Fill the hole with the last entry and restore the heap property
+        if index < len(self.heap):
+            self.heap[index] = last
+            self.position[last[2]] = index
+            self.sift_up(index)
+            self.sift_down(self.position[last[2]])
+
+    def sift_up(self, index: int) -> None:
+        heap = self.heap
+        entry = heap[index]
+
+        while index > 0:
+            parent = (index - 1) >> 1
+            if heap[parent] <= entry:
+                break
+            heap[index] = heap[parent]
+            self.position[heap[index][2]] = index
+            index = parent
+
+        heap[index] = entry
+        self.position[entry[2]] = index
+
+    def sift_down(self, index: int) -> None:
+        heap = self.heap
+        entry = heap[index]
+        size = len(heap)
+
+        while True:
+            child = 2 * index + 1
+            if child >= size:
+                break
+            if child + 1 < size and heap[child + 1] < heap[child]:
+                child += 1
+            if entry <= heap[child]:
+                break
+            heap[index] = heap[child]
+            self.position[heap[index][2]] = index
+            index = child
+
+        heap[index] = entry
+        self.position[entry[2]] = index
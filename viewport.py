@@ -0,0 +1,212 @@
+"""
+Camera over boards too large to draw cell by cell. Only the visible part of the
+board is rendered, as an image built from the state arrays with NumPy and
+scaled onto the screen. When zoomed out far enough that several cells share a
+pixel, blocks of cells are aggregated, keeping the most important state.
+"""
+import math
+import time
+import pygame
+import numpy as np
+
+from settings import *
+from board import START, END, OPENED, CLOSED, PATH, OPENED_BACK, CLOSED_BACK
+from renderer import TERRAIN
+
+
+# Zoom limits, in pixels per cell
+MAX_ZOOM = 40
+
+# From this zoom, cell outlines and the pin and flag images are drawn
+DETAIL_ZOOM = 6
+
+# Redraws per second while a search is reporting its progress
+REFRESH_RATE = 30
+
+# Colour of the start and end once they are too small for their images
+MARKER = (255, 165, 0)
+
+# Colour of each drawing code, in increasing order of importance
+PALETTE = np.array(
+    [BLACK, YELLOW, GREEN, PURPLE, RED, WHITE, BLUE, MARKER, MARKER], dtype=np.uint8
+)
+
+
+def drawing_codes() -> np.ndarray:
+    """
+    Lookup table from a cell's state byte, with the obstruction in the top bit,
+    to its index into PALETTE. Follows the priorities of BoardRenderer.paint.
+    """
+    table = np.zeros(256, dtype=np.uint8)
+    for key in range(256):
+        if key & 128:
+            table[key] = 5
+        elif key & START:
+            table[key] = 8
+        elif key & END:
+            table[key] = 7
+        elif key & PATH:
+            table[key] = 6
+        elif key & CLOSED:
+            table[key] = 4
+        elif key & CLOSED_BACK:
+            table[key] = 3
+        elif key & OPENED:
+            table[key] = 2
+        elif key & OPENED_BACK:
+            table[key] = 1
+    return table
+
+
+CODES = drawing_codes()
+
+
+class Viewport:
+    """
+    Pannable, zoomable view of a board inside a rectangle of the screen, with
+    the same drawing interface as BoardRenderer.
+    """
+
+    def __init__(self, board, board_origin, size, pin, flag):
+
+        self.board = board
+        self.rect = pygame.Rect(board_origin, size)
+        self.pin = pin
+        self.flag = flag
+
+        # Zooming out stops once the whole board fits, which is where it starts
+        self.min_zoom = min(size[0] / board.width, size[1] / board.height, MAX_ZOOM)
+        self.zoom = self.min_zoom
+
+        # Board coordinates, in cells, of the top left corner of the view
+        self.left = 0.0
+        self.top = 0.0
+
+        self.last_update = 0.0
+
+    def mark(self, index: int) -> None:
+        """Nothing to track, as every draw reads the board arrays directly."""
+
+    def mark_all(self, indices) -> None:
+        """Nothing to track, as every draw reads the board arrays directly."""
+
+    def clamp(self) -> None:
+        """Keeps the zoom within its limits and the board in view."""
+        self.zoom = min(max(self.zoom, self.min_zoom), MAX_ZOOM)
+        columns = self.rect.width / self.zoom
+        rows = self.rect.height / self.zoom
+        self.left = min(max(self.left, 0.0), max(self.board.width - columns, 0.0))
+        self.top = min(max(self.top, 0.0), max(self.board.height - rows, 0.0))
+
+    def pan(self, dx: float, dy: float) -> None:
+        """Moves the camera by a distance in pixels."""
+        self.left += dx / self.zoom
+        self.top += dy / self.zoom
+        self.clamp()
+
+    def zoom_at(self, factor: float, pos: tuple) -> None:
+        """Zooms by a factor, keeping the point of the board under pos in place."""
+        x = (pos[0] - self.rect.x) / self.zoom + self.left
+        y = (pos[1] - self.rect.y) / self.zoom + self.top
+
+        self.zoom *= factor
+        self.clamp()
+        self.left = x - (pos[0] - self.rect.x) / self.zoom
+        self.top = y - (pos[1] - self.rect.y) / self.zoom
+        self.clamp()
+
+    def cell_at(self, pos: tuple):
+        """Returns the index of the cell under a screen position, or None."""
+        if not self.rect.collidepoint(pos):
+            return None
+
+        i = int(self.top + (pos[1] - self.rect.y) / self.zoom)
+        j = int(self.left + (pos[0] - self.rect.x) / self.zoom)
+        if 0 <= i < self.board.height and 0 <= j < self.board.width:
+            return self.board.index(i, j)
+        return None
+
+    def visible(self) -> tuple:
+        """Returns the first and past-the-end rows and columns in view."""
+        top, left = int(self.top), int(self.left)
+        bottom = min(math.ceil(self.top + self.rect.height / self.zoom), self.board.height)
+        right = min(math.ceil(self.left + self.rect.width / self.zoom), self.board.width)
+        return top, bottom, left, right
+
+    def image(self, top: int, bottom: int, left: int, right: int, block: int) -> pygame.Surface:
+        """
+        Renders the visible cells to a surface with one pixel per block of cells,
+        each block taking the colour of its most important cell, or if none of
+        them is marked, of its dearest terrain.
+        """
+        board = self.board
+        shape = (board.height, board.width)
+        state = board.state.reshape(shape)[top:bottom, left:right]
+        obstruction = board.obstruction.reshape(shape)[top:bottom, left:right]
+        codes = CODES[state | (obstruction.astype(np.uint8) << 7)]
+        cost = board.cost.reshape(shape)[top:bottom, left:right]
+
+        if block > 1:
+            codes, cost = (self.pool(layer, block) for layer in (codes, cost))
+
+        # surfarray expects the x axis first
+        colours = np.where((codes == 0)[..., None], TERRAIN[cost], PALETTE[codes])
+        return pygame.surfarray.make_surface(colours.transpose(1, 0, 2))
+
+    @staticmethod
+    def pool(layer: np.ndarray, block: int) -> np.ndarray:
+        """Largest value in every block of cells, padding the edges with zeros."""
+        rows, columns = -(-layer.shape[0] // block), -(-layer.shape[1] // block)
+        padded = np.zeros((rows * block, columns * block), dtype=layer.dtype)
+        padded[: layer.shape[0], : layer.shape[1]] = layer
+        return padded.reshape(rows, block, columns, block).max(axis=(1, 3))
+
+    def draw(self, screen: pygame.Surface) -> None:
+        """Draws the visible part of the board into the viewport."""
+        top, bottom, left, right = self.visible()
+        block = max(1, int(1 / self.zoom))
+        zoom = self.zoom
+
+        image = self.image(top, bottom, left, right, block)
+        size = (round((right - left) * zoom), round((bottom - top) * zoom))
+        origin = (
+            self.rect.x + round((left - self.left) * zoom),
+            self.rect.y + round((top - self.top) * zoom),
+        )
+
+        clip = screen.get_clip()
+        screen.set_clip(self.rect)
+        screen.blit(pygame.transform.scale(image, size), origin)
+
+        if zoom >= DETAIL_ZOOM:
+            self.draw_details(screen, top, bottom, left, right, origin)
+
+        screen.set_clip(clip)
+
+    def draw_details(self, screen, top, bottom, left, right, origin) -> None:
+        """Outlines the visible cells and puts the pin and flag on the start and end."""
+        zoom = self.zoom
+        x, y = origin
+        end_x = x + round((right - left) * zoom)
+        end_y = y + round((bottom - top) * zoom)
+
+        for j in range(right - left + 1):
+            pygame.draw.line(screen, WHITE, (x + round(j * zoom), y), (x + round(j * zoom), end_y))
+        for i in range(bottom - top + 1):
+            pygame.draw.line(screen, WHITE, (x, y + round(i * zoom)), (end_x, y + round(i * zoom)))
+
+        state = self.board.state.reshape(self.board.height, self.board.width)[top:bottom, left:right]
+        size = (max(round(zoom) - 2, 1),) * 2
+        for image, bit in ((self.pin, START), (self.flag, END)):
+            for i, j in np.argwhere(state & bit):
+                screen.blit(pygame.transform.scale(image, size), (x + round(j * zoom) + 1, y + round(i * zoom) + 1))
+
+    def update(self, screen: pygame.Surface) -> None:
+        """Redraws the viewport while a search runs, at most REFRESH_RATE times a second."""
+        now = time.perf_counter()
+        if now - self.last_update < 1 / REFRESH_RATE:
+            return
+
+        self.last_update = now
+        self.draw(screen)
+        pygame.display.update(self.rect)
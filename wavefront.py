@@ -0,0 +1,95 @@
+"""
+Breadth first search by wavefront. Instead of popping cells one at a time, the
+whole frontier is advanced at once with NumPy index arithmetic and masks,
+producing a distance field and a parent-direction field for the map. Works
+directly on an obstacle mask such as the one the runner generates.
+"""
+import numpy as np
+
+from board import DIRECTIONS
+
+
+# Parent direction of cells that have none: the source and unreachable cells
+NONE = 255
+
+
+def wavefront(mask, source: tuple, target: tuple = None) -> tuple:
+    """
+    Spreads out from source over the free cells of the mask, where a truthy
+    value is an obstruction. Returns the distance field, in steps with -1 for
+    unreachable cells, and the parent field, holding for each cell the index
+    into DIRECTIONS of the step back towards the source. Stops early once the
+    target is reached, if one is given.
+    """
+    layers = spread(mask, source, target)
+    while True:
+        try:
+            next(layers)
+        except StopIteration as done:
+            return done.value
+
+
+def spread(mask, source: tuple, target: tuple = None):
+    """
+    Generator behind wavefront, yielding the flat indices of each new layer as
+    it is reached and returning the distance and parent fields.
+    """
+    mask = np.asarray(mask) != 0
+    height, width = mask.shape
+    stride = width + 2
+
+    # Pad the map with a ring of obstructions, so that neighbours never need
+    # bounds checks, and work on flat indices into the padded map
+    unseen = np.zeros((height + 2, stride), dtype=bool)
+    unseen[1:-1, 1:-1] = ~mask
+    unseen = unseen.reshape(-1)
+
+    distance = np.full(unseen.size, -1, dtype=np.int32)
+    parents = np.full(unseen.size, NONE, dtype=np.uint8)
+
+    offsets = np.array([di * stride + dj for di, dj in DIRECTIONS])
+    backwards = np.array([7 - k for k in range(len(DIRECTIONS))], dtype=np.uint8)
+
+    frontier = np.array([(source[0] + 1) * stride + source[1] + 1])
+    if not unseen[frontier[0]]:
+        frontier = frontier[:0]
+    unseen[frontier] = False
+    distance[frontier] = 0
+
+    goal = None if target is None else (target[0] + 1) * stride + target[1] + 1
+    steps = 0
+
+    while len(frontier) and (goal is None or distance[goal] < 0):
+        steps += 1
+
+        # Every neighbour of every frontier cell at once, one row per direction
+        candidates = offsets[:, None] + frontier[None, :]
+        fresh = unseen[candidates]
+        cells = candidates[fresh]
+        directions = np.broadcast_to(backwards[:, None], candidates.shape)[fresh]
+
+        # A cell reached from several frontier cells keeps its first direction
+        frontier, first = np.unique(cells, return_index=True)
+        parents[frontier] = directions[first]
+        distance[frontier] = steps
+        unseen[frontier] = False
+
+        if len(frontier):
+            row, column = np.divmod(frontier, stride)
+            yield (row - 1) * width + column - 1
+
+    shape = (height + 2, stride)
+    return distance.reshape(shape)[1:-1, 1:-1], parents.reshape(shape)[1:-1, 1:-1]
+
+
+def trace(parents: np.ndarray, end: tuple) -> list:
+    """Follows a parent field back from end, returning the (row, column) path from its source."""
+    path = [tuple(end)]
+
+    while parents[path[-1]] != NONE:
+        di, dj = DIRECTIONS[parents[path[-1]]]
+        i, j = path[-1]
+        path.append((i + di, j + dj))
+
+    path.reverse()
+    return path